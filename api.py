@@ -0,0 +1,221 @@
+"""
+JSON API for Merit Akademik automation jobs
+
+Lets other systems upload matric lists, submit jobs, follow their progress
+and download the results without going through the HTML form. Mounted by
+app.py under /api.
+
+Typical use:
+    POST /api/uploads              multipart 'file' fields -> stored filenames
+    POST /api/jobs                 JSON job spec -> 202 with the job
+    GET  /api/jobs/<id>            status, progress and log
+    GET  /api/jobs/<id>/stream     progress as Server-Sent Events
+    GET  /api/jobs/<id>/log/stream live job log as Server-Sent Events
+    GET  /api/jobs/<id>/results    results CSV (?format=xlsx, failed, trace or profile)
+    GET  /api/storage              disk use of the data folders
+"""
+import os
+import hmac
+from flask import Blueprint, request, jsonify, Response, send_from_directory
+from config import (
+    UPLOAD_FOLDER, SESI_OPTIONS, SEMESTER_OPTIONS, ACHIEVEMENT_OPTIONS,
+    API_TOKEN, PROFILE_DEFAULT_SECONDS
+)
+from utils import save_uploaded_files, validate_form_data, build_job_spec
+from jobs import get_registry, FINISHED_STATES
+from logs import tail_job_log
+from retention import get_manager as get_retention_manager
+
+api = Blueprint('api', __name__)
+
+# Progress fields holding the file for each results format
+RESULT_FORMATS = {
+    'csv': 'results_file',
+    'xlsx': 'results_xlsx',
+    'failed': 'failed_file',
+    'trace': 'trace_file',
+    'profile': 'profile_file',
+}
+
+
+@api.before_request
+def check_token():
+    """Require 'Authorization: Bearer <API_TOKEN>' when a token is configured."""
+    if request.blueprint != 'api':
+        return None
+    return require_token()
+
+
+def require_token():
+    """401 response unless the request carries API_TOKEN, or None to go on."""
+    if not API_TOKEN:
+        return None
+    header = request.headers.get('Authorization', '')
+    token = header[len('Bearer '):] if header.startswith('Bearer ') else ''
+    if not hmac.compare_digest(token.encode(), API_TOKEN.encode()):
+        return jsonify({'error': 'Invalid or missing API token'}), 401
+    return None
+
+
+def job_not_found(job_id):
+    """404 response for an unknown job id."""
+    return jsonify({'error': f"Job '{job_id}' not found"}), 404
+
+
+@api.route('/options')
+def get_options():
+    """List the accepted sesi, semester and achievement values."""
+    return jsonify({'sesi': SESI_OPTIONS,
+                    'semester': SEMESTER_OPTIONS,
+                    'achievement': ACHIEVEMENT_OPTIONS})
+
+
+@api.route('/storage')
+def get_storage():
+    """Disk use of the managed data folders as of the last retention sweep."""
+    manager = get_retention_manager()
+    return jsonify({'folders': manager.usage(),
+                    'last_sweep': manager.last_sweep})
+
+
+@api.route('/uploads', methods=['POST'])
+def upload_files():
+    """Store uploaded files and return their names and shared columns."""
+    try:
+        filenames, columns = save_uploaded_files(request.files.getlist('file'))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'filenames': filenames, 'columns': columns}), 201
+
+
+@api.route('/jobs', methods=['GET'])
+def list_jobs():
+    """List known jobs, newest first."""
+    return jsonify({'jobs': [job.to_dict() for job in get_registry().list()]})
+
+
+@api.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Submit a job from a JSON body.
+
+    Expects filenames (from /uploads), matric_column, username, password,
+    sesi, semester and achievement.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+
+    try:
+        spec, duplicates = build_job_spec(validate_form_data(data))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        job = get_registry().submit(spec)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+
+    body = dict(job.to_dict(), duplicates=duplicates)
+    return jsonify(body), 202, {'Location': f"{request.script_root}{request.path}/{job.id}"}
+
+
+@api.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Get the details and log of one job."""
+    job = get_registry().get(job_id)
+    if not job:
+        return job_not_found(job_id)
+    return jsonify(job.to_dict(include_logs=True))
+
+
+@api.route('/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """Stream progress updates of one job as Server-Sent Events."""
+    job = get_registry().get(job_id)
+    if not job:
+        return job_not_found(job_id)
+    return job_event_response(job)
+
+
+@api.route('/jobs/<job_id>/log/stream')
+def stream_job_log(job_id):
+    """Tail a job's structured log as Server-Sent Events, one JSON line per event."""
+    registry = get_registry()
+    if not registry.get(job_id):
+        return job_not_found(job_id)
+
+    def is_finished():
+        job = registry.get(job_id)
+        return job is None or job.status in FINISHED_STATES
+
+    return event_stream_response(tail_job_log(job_id, is_finished, last_event_id()))
+
+
+@api.route('/jobs/<job_id>/results')
+def download_job_results(job_id):
+    """Download a job's results file; ?format= csv (default), xlsx, failed, trace or profile."""
+    job = get_registry().get(job_id)
+    if not job:
+        return job_not_found(job_id)
+
+    result_format = request.args.get('format', 'csv')
+    if result_format not in RESULT_FORMATS:
+        return jsonify({'error': f"Unknown format '{result_format}'"}), 400
+
+    filename = job.snapshot().get(RESULT_FORMATS[result_format])
+    if not filename:
+        return jsonify({'error': f"No {result_format} results for job '{job_id}' yet"}), 404
+    # failed_file is stored as a full path
+    return send_from_directory(UPLOAD_FOLDER, os.path.basename(filename),
+                               as_attachment=True)
+
+
+@api.route('/jobs/<job_id>/<action>', methods=['POST'])
+def control_job(job_id, action):
+    """Pause, resume, cancel or profile a job; profile takes ?seconds= or JSON 'seconds'."""
+    job = get_registry().get(job_id)
+    if not job:
+        return job_not_found(job_id)
+    if action not in ('pause', 'resume', 'cancel', 'profile'):
+        return jsonify({'error': f"Unknown action '{action}'"}), 404
+
+    try:
+        if action == 'profile':
+            seconds = request.args.get('seconds') or \
+                (request.get_json(silent=True) or {}).get('seconds') or PROFILE_DEFAULT_SECONDS
+            try:
+                seconds = float(seconds)
+            except (TypeError, ValueError):
+                seconds = 0
+            if seconds <= 0:
+                return jsonify({'error': 'seconds must be a positive number'}), 400
+            job.profile(seconds)
+        else:
+            getattr(job, action)()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(job.to_dict())
+
+
+def last_event_id():
+    """The Last-Event-ID a reconnecting SSE client sent, or 0."""
+    value = request.headers.get('Last-Event-ID') or \
+        request.args.get('last_event_id', '0')
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def event_stream_response(stream):
+    """Wrap an SSE generator in an unbuffered response."""
+    return Response(stream,
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache',
+                             'X-Accel-Buffering': 'no'})
+
+
+def job_event_response(job):
+    """Build the SSE response for a job, resuming from Last-Event-ID."""
+    return event_stream_response(job.event_stream(last_event_id()))
@@ -0,0 +1,103 @@
+"""
+Static asset delivery for the Merit Akademik web interface
+
+CSS and JS files are read, hashed and gzipped once when the app starts.
+Pages link to them with the hash in the URL, so browsers can cache them for
+a year and still pick up a new version after an update.
+"""
+
+import os
+import gzip
+import hashlib
+import mimetypes
+from flask import request, Response, abort
+
+# Browsers may keep a hashed asset for a year
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# Files smaller than this are not worth compressing
+GZIP_MIN_SIZE = 512
+
+
+class StaticAssets:
+    """Precompressed static files with strong ETags."""
+
+    def __init__(self, folder):
+        """
+        Load every file in a folder.
+
+        Args:
+            folder (str): Folder holding the static files
+        """
+        self.folder = folder
+        self._assets = {}
+
+        for root, _, files in os.walk(folder):
+            for name in files:
+                path = os.path.join(root, name)
+                key = os.path.relpath(path, folder).replace(os.sep, '/')
+                self._assets[key] = self._load(path)
+
+    @staticmethod
+    def _load(path):
+        with open(path, 'rb') as file:
+            body = file.read()
+
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        compressed = None
+        if len(body) >= GZIP_MIN_SIZE:
+            # mtime=0 keeps the compressed bytes the same across restarts
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) >= len(body):
+                compressed = None
+
+        return {'body': body, 'gzip': compressed,
+                'etag': digest, 'mimetype': mimetype}
+
+    def url(self, filename):
+        """
+        URL of an asset with its content hash, for templates.
+
+        Args:
+            filename (str): Path relative to the static folder
+
+        Returns:
+            str: URL such as /static/app.css?v=<hash>
+        """
+        asset = self._assets.get(filename)
+        version = f"?v={asset['etag']}" if asset else ''
+        return f"/static/{filename}{version}"
+
+    def response(self, filename):
+        """
+        Build the response for an asset request.
+
+        Sends 304 when the ETag matches and the gzip copy when the client
+        accepts it.
+
+        Args:
+            filename (str): Path relative to the static folder
+
+        Returns:
+            Response: The asset, or 304 Not Modified
+        """
+        asset = self._assets.get(filename)
+        if asset is None:
+            abort(404)
+
+        headers = {
+            'ETag': f'"{asset["etag"]}"',
+            'Cache-Control': f'public, max-age={ASSET_MAX_AGE}, immutable',
+            'Vary': 'Accept-Encoding',
+        }
+        if asset['etag'] in request.if_none_match:
+            return Response(status=304, headers=headers)
+
+        body = asset['body']
+        if asset['gzip'] and 'gzip' in request.accept_encodings:
+            body = asset['gzip']
+            headers['Content-Encoding'] = 'gzip'
+
+        return Response(body, mimetype=asset['mimetype'], headers=headers)
@@ -3,88 +3,130 @@ Selenium automation module for Merit Akademik system
 """
 
 import os
-import sys
 import time
 import csv
 from datetime import datetime
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from config import LOGIN_URL, SELENIUM_WAIT_TIME, SELENIUM_HEADLESS, SCREENSHOTS_FOLDER, UPLOAD_FOLDER
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from driver_factory import create_driver
+from tracing import NullTracer
+from evidence import EvidenceRecorder
+from pacing import RateController
+from logs import get_logger, log_context, SUCCESS
+from metrics import RECORDS, FAILURES, ACTIVE_BROWSERS, DRIVER_STARTS
+from config import LOGIN_URL, SELENIUM_WAIT_TIME, UPLOAD_FOLDER
+
+log = get_logger(__name__)
+
+
+def error_class(error):
+    """Name of the exception behind a failed record, looking through wrappers."""
+    return type(error.__cause__ or error).__name__
+
+
+def is_overload(error):
+    """
+    True if a record failed because eKolej or the browser did not keep up.
+
+    Timeouts, dropped connections and bare WebDriver errors count. Subclasses
+    such as NoSuchElementException mean the page answered without what was
+    asked for, like an unknown matric number, and do not.
+    """
+    cause = error.__cause__ or error
+    if isinstance(cause, (TimeoutException, TimeoutError, ConnectionError)):
+        return True
+    return type(cause) is WebDriverException or \
+        type(cause).__module__.startswith('urllib3')
 
 
 class MeritAkademikAutomation:
     """Main automation class for Merit Akademik system."""
 
-    def __init__(self):
-        """Initialize the automation with selenium webdriver."""
+    def __init__(self, headless_mode=None, tracer=None, evidence=None, rate=None,
+                 login_url=None):
+        """
+        Initialize the automation with selenium webdriver.
+
+        Args:
+            headless_mode (str): Chrome headless mode ('new', 'old' or 'off');
+                defaults to the configured mode
+            tracer (Tracer): Receives a timed span for every step
+            evidence (EvidenceRecorder): Failure evidence budget, shared
+                when several sessions make up one run
+            rate (RateController): Submission slots and pacing, shared
+                when several sessions make up one run
+            login_url (str): eKolej login page; defaults to LOGIN_URL
+        """
+        self.headless_mode = headless_mode
+        self.login_url = login_url or LOGIN_URL
+        self.tracer = tracer or NullTracer()
+        self.evidence = evidence or EvidenceRecorder()
+        self.rate = rate or RateController()
         self.driver = None
         self.progress_callback = None
+        self.outcome_callback = None
+        self.last_screenshot = None
+        self.control = None
         self.setup_driver()
 
     def setup_driver(self):
-        """Setup Chrome webdriver with bundled Chrome binaries."""
-        options = Options()
-
-        # Get the base path (works for both script and executable)
-        if getattr(sys, 'frozen', False):
-            # Running as compiled executable
-            base_path = sys._MEIPASS
-        else:
-            # Running as script
-            base_path = os.path.dirname(os.path.abspath(__file__))
-
-        # Path to bundled Chrome binaries
-        chrome_bin_path = os.path.join(base_path, "chrome-bin")
-        chrome_exe = os.path.join(chrome_bin_path, "chrome.exe")
-        chromedriver_exe = os.path.join(chrome_bin_path, "chromedriver.exe")
-
-        # Verify Chrome binaries exist
-        if not os.path.exists(chrome_exe):
-            raise FileNotFoundError(
-                f"Chrome executable not found at: {chrome_exe}")
-        if not os.path.exists(chromedriver_exe):
-            raise FileNotFoundError(
-                f"ChromeDriver executable not found at: {chromedriver_exe}")
-
-        print(f"Using Chrome binary: {chrome_exe}")
-        print(f"Using ChromeDriver: {chromedriver_exe}")
-
-        # Set Chrome binary location
-        options.binary_location = chrome_exe
-
-        # Configure Chrome options for better compatibility
-        if SELENIUM_HEADLESS:
-            options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-plugins")
-        options.add_argument("--disable-images")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-
-        # Additional Chrome options for stability and certificate handling
-        options.add_argument("--ignore-certificate-errors")
-        options.add_argument("--allow-insecure-localhost")
-        options.add_argument("--ignore-ssl-errors")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-
-        # Initialize Chrome driver
-        service = Service(chromedriver_exe)
-        self.driver = webdriver.Chrome(service=service, options=options)
-        self.driver.implicitly_wait(SELENIUM_WAIT_TIME)
+        """Start Chrome through the shared driver factory."""
+        with self.tracer.span('driver_start'):
+            try:
+                self.driver = create_driver(self.headless_mode)
+            except Exception:
+                DRIVER_STARTS.inc(result='error')
+                raise
+        DRIVER_STARTS.inc(result='ok')
+        ACTIVE_BROWSERS.inc()
+
+    def capture_evidence(self, name, matric=None):
+        """
+        Capture the current page after a failure; files are written in the background.
+
+        Args:
+            name (str): File name without extension, such as 'login_error'
+            matric (str): Matric number the evidence belongs to
+
+        Returns:
+            str: Path of the screenshot or page snapshot, or None when the
+                run's evidence budget is used up
+        """
+        with self.tracer.span('evidence', matric=matric):
+            return self.evidence.capture(self.driver, name)
 
     def set_progress_callback(self, callback):
         """Set callback function for progress updates."""
         self.progress_callback = callback
 
+    def set_outcome_callback(self, callback):
+        """
+        Set a function called after each record of process_matric_list.
+
+        It receives the number of records finished in the list so far, the
+        matric number and 'success' or 'failed'.
+        """
+        self.outcome_callback = callback
+
+    def set_control(self, control):
+        """Set the JobControl checked for pause and cancel between records."""
+        self.control = control
+
+    def keep_session_alive(self):
+        """Touch the eKolej session without changing the page, so a paused run stays logged in."""
+        try:
+            self.driver.execute_script(
+                "fetch(window.location.href, {credentials: 'same-origin'}); return true;")
+        except Exception as e:
+            log.warning(f"Session keepalive failed: {str(e)}")
+
+    def stop_requested(self):
+        """True once the run has been cancelled."""
+        return bool(self.control and self.control.cancelled)
+
     def update_progress(self, current, total, message):
         """Update progress through callback if available."""
         if self.progress_callback:
@@ -102,10 +144,12 @@ class MeritAkademikAutomation:
             bool: True if login successful, False otherwise
         """
         try:
-            self.driver.get(LOGIN_URL)
+            with self.tracer.span('login.open_page'):
+                self.driver.get(self.login_url)
 
             # Wait for login form to be present
             wait = WebDriverWait(self.driver, 10)
+            step_started = time.perf_counter()
 
             # Try different possible selectors for username field
             username_selectors = [
@@ -150,12 +194,15 @@ class MeritAkademikAutomation:
 
             if not password_field:
                 raise Exception("Could not find password field")
+            self.tracer.record('login.find_fields', step_started, time.perf_counter())
 
             # Clear and fill the fields
-            username_field.clear()
-            username_field.send_keys(username)
-            password_field.clear()
-            password_field.send_keys(password)
+            with self.tracer.span('login.fill'):
+                username_field.clear()
+                username_field.send_keys(username)
+                password_field.clear()
+                password_field.send_keys(password)
+            step_started = time.perf_counter()
 
             # Try different possible selectors for login button
             login_button_selectors = [
@@ -186,24 +233,24 @@ class MeritAkademikAutomation:
 
             # Wait for login to complete and check result
             time.sleep(2)
+            self.tracer.record('login.submit', step_started, time.perf_counter())
 
             # Check if login was successful
             if "login" in self.driver.current_url.lower():
-                self.driver.save_screenshot(os.path.join(
-                    SCREENSHOTS_FOLDER, "login_failed.png"))
+                self.capture_evidence("login_failed")
                 return False
 
             return True
 
         except Exception as e:
-            self.driver.save_screenshot(os.path.join(
-                SCREENSHOTS_FOLDER, "login_error.png"))
+            self.capture_evidence("login_error")
             raise Exception(f"Login failed: {str(e)}")
 
     def navigate_to_merit_akademik(self):
         """Navigate to the Merit Akademik page."""
         try:
             # Find Merit menu
+            step_started = time.perf_counter()
             merit_menu_selectors = [
                 "//a[.//span[contains(text(), 'Merit')]]",
                 "//a[.//i[contains(@class, 'ion-ribbon-b')]]",
@@ -224,13 +271,14 @@ class MeritAkademikAutomation:
                     continue
 
             if not merit_menu:
-                self.driver.save_screenshot(os.path.join(
-                    SCREENSHOTS_FOLDER, "menu_not_found.png"))
+                self.capture_evidence("menu_not_found")
                 raise Exception("Could not find Merit menu")
 
             # Click Merit menu
             self.driver.execute_script("arguments[0].click();", merit_menu)
             time.sleep(SELENIUM_WAIT_TIME)
+            self.tracer.record('navigation.menu', step_started, time.perf_counter())
+            step_started = time.perf_counter()
 
             # Find and click Merit Akademik submenu
             merit_akademik_selectors = [
@@ -249,20 +297,19 @@ class MeritAkademikAutomation:
                     continue
 
             if not merit_akademik_link:
-                self.driver.save_screenshot(os.path.join(
-                    SCREENSHOTS_FOLDER, "submenu_not_found.png"))
+                self.capture_evidence("submenu_not_found")
                 raise Exception("Could not find Merit Akademik submenu")
 
             # Click Merit Akademik submenu
             self.driver.execute_script(
                 "arguments[0].click();", merit_akademik_link)
             time.sleep(2)
+            self.tracer.record('navigation.submenu', step_started, time.perf_counter())
 
             return True
 
         except Exception as e:
-            self.driver.save_screenshot(os.path.join(
-                SCREENSHOTS_FOLDER, "navigation_error.png"))
+            self.capture_evidence("navigation_error")
             raise Exception(f"Navigation failed: {str(e)}")
 
     def find_tambah_button(self):
@@ -308,53 +355,63 @@ class MeritAkademikAutomation:
         Returns:
             bool: True if successful, False otherwise
         """
+        self.last_screenshot = None
+        span = self.tracer.span
         try:
             # Find and click Tambah button
-            tambah_btn = self.find_tambah_button()
+            with span('tambah.find', matric=matric):
+                tambah_btn = self.find_tambah_button()
             if not tambah_btn:
                 raise Exception("Could not find Tambah button")
 
-            self.driver.execute_script("arguments[0].click();", tambah_btn)
-            time.sleep(SELENIUM_WAIT_TIME)
+            with span('tambah.click', matric=matric):
+                self.driver.execute_script("arguments[0].click();", tambah_btn)
+                time.sleep(SELENIUM_WAIT_TIME)
 
             # Select matric number
-            select_matric = Select(
-                self.driver.find_element(By.ID, "a_matric_no"))
-            select_matric.select_by_value(matric)
-            time.sleep(SELENIUM_WAIT_TIME)
+            with span('select.matric', matric=matric):
+                select_matric = Select(
+                    self.driver.find_element(By.ID, "a_matric_no"))
+                select_matric.select_by_value(matric)
+                time.sleep(SELENIUM_WAIT_TIME)
 
             # Select sesi
-            select_sesi = Select(self.driver.find_element(By.ID, "a_session"))
-            select_sesi.select_by_value(sesi)
-            time.sleep(SELENIUM_WAIT_TIME)
+            with span('select.session', matric=matric):
+                select_sesi = Select(self.driver.find_element(By.ID, "a_session"))
+                select_sesi.select_by_value(sesi)
+                time.sleep(SELENIUM_WAIT_TIME)
 
             # Select semester
-            select_sem = Select(self.driver.find_element(By.ID, "a_semester"))
-            select_sem.select_by_value(semester)
-            time.sleep(SELENIUM_WAIT_TIME)
+            with span('select.semester', matric=matric):
+                select_sem = Select(self.driver.find_element(By.ID, "a_semester"))
+                select_sem.select_by_value(semester)
+                time.sleep(SELENIUM_WAIT_TIME)
 
             # Select achievement
-            select_ach = Select(
-                self.driver.find_element(By.ID, "a_achievement"))
-            select_ach.select_by_value(achievement)
-            time.sleep(SELENIUM_WAIT_TIME)
+            with span('select.achievement', matric=matric):
+                select_ach = Select(
+                    self.driver.find_element(By.ID, "a_achievement"))
+                select_ach.select_by_value(achievement)
+                time.sleep(SELENIUM_WAIT_TIME)
 
             # Save the record
-            save_btn = self.driver.find_element(
-                By.XPATH, "//a[contains(@class, 'btn') and contains(@class, 'btn-xs') and contains(@class, 'btn-primary')]"
-            )
-            self.driver.execute_script("arguments[0].click();", save_btn)
-            time.sleep(2)  # Wait for save to complete
+            with span('save', matric=matric):
+                save_btn = self.driver.find_element(
+                    By.XPATH, "//a[contains(@class, 'btn') and contains(@class, 'btn-xs') and contains(@class, 'btn-primary')]"
+                )
+                self.driver.execute_script("arguments[0].click();", save_btn)
+                time.sleep(2)  # Wait for save to complete
 
             return True
 
         except Exception as e:
-            # Save screenshot for critical errors only
-            self.driver.save_screenshot(os.path.join(
-                SCREENSHOTS_FOLDER, f"matric_error_{matric}.png"))
-            raise Exception(f"Failed to process matric {matric}: {str(e)}")
+            # Save evidence for critical errors only
+            self.last_screenshot = self.capture_evidence(
+                f"matric_error_{matric}", matric=matric)
+            raise Exception(
+                f"Failed to process matric {matric}: {str(e)}") from e
 
-    def process_matric_list(self, matric_list, sesi, semester, achievement):
+    def process_matric_list(self, matric_list, sesi, semester, achievement, results_writer=None):
         """
         Process a list of matric numbers with progress reporting.
 
@@ -363,68 +420,185 @@ class MeritAkademikAutomation:
             sesi (str): Academic session
             semester (str): Semester
             achievement (str): Achievement level
+            results_writer (ResultsWriter): Optional writer that receives
+                each record's outcome as soon as it is known
 
         Returns:
-            dict: Results with success_count, error_count, and failed_matrics
+            dict: Results with success_count, error_count, failed_matrics,
+                cancelled and unprocessed_matrics
         """
         success_count = 0
         error_count = 0
         failed_matrics = []
+        unprocessed_matrics = []
+        cancelled = False
         total_count = len(matric_list)
 
-        print(f"[INFO] Starting to process {total_count} matric numbers...")
+        log.info(f"Starting to process {total_count} matric numbers...")
 
         for index, matric in enumerate(matric_list, 1):
-            try:
-                # Report progress
-                self.update_progress(index, total_count,
-                                     f"Processing matric {matric}")
-                print(f"[INFO] Processing {index}/{total_count}: {matric}")
-
-                self.process_single_matric(matric, sesi, semester, achievement)
-                success_count += 1
-                print(f"[SUCCESS] Successfully processed {matric}")
+            # Pause and cancel take effect between records
+            if self.control:
+                if self.control.paused:
+                    # Reported like a record about to start, so index - 1
+                    # records count as done
+                    self.update_progress(index, total_count, "Paused")
+                    log.info("Paused")
+                    self.control.wait_if_paused(self.keep_session_alive)
+                if self.control.cancelled:
+                    cancelled = True
+                    unprocessed_matrics = list(matric_list[index - 1:])
+                    log.info(
+                        f"Cancelled with {len(unprocessed_matrics)} matric numbers left")
+                    break
 
-            except Exception as e:
-                error_count += 1
-                failed_matrics.append(matric)
-                print(f"[ERROR] Error processing matric {matric}: {str(e)}")
+            # The rate controller decides when this session may submit next
+            waiting = time.perf_counter()
+            waited = self.rate.acquire(self.keep_session_alive, self.stop_requested)
+            if waited is None:
+                cancelled = True
+                unprocessed_matrics = list(matric_list[index - 1:])
+                log.info(
+                    f"Cancelled with {len(unprocessed_matrics)} matric numbers left")
+                break
+            if waited >= 0.01:
+                self.tracer.record('pacing', waiting, waiting + waited)
+
+            started = time.perf_counter()
+            failed = overload = False
+            # Every log line of this record names its matric number
+            with log_context(matric=matric):
+                try:
+                    # Report progress
+                    self.update_progress(index, total_count,
+                                         f"Processing matric {matric}")
+                    log.info(f"Processing {index}/{total_count}: {matric}")
+
+                    self.process_single_matric(matric, sesi, semester, achievement)
+                    success_count += 1
+                    log.log(SUCCESS, f"Successfully processed {matric}")
+                    self.tracer.record('record', started, time.perf_counter(),
+                                       matric=matric, status='success')
+                    RECORDS.inc(status='success')
+                    self.record_outcome(results_writer, matric, 'success',
+                                        time.perf_counter() - started)
+
+                except Exception as e:
+                    failed = True
+                    overload = is_overload(e)
+                    error_count += 1
+                    failed_matrics.append(matric)
+                    log.error(f"Error processing matric {matric}: {str(e)}")
+                    self.tracer.record('record', started, time.perf_counter(),
+                                       matric=matric, status='failed')
+                    RECORDS.inc(status='failed')
+                    FAILURES.inc(error_class=error_class(e))
+                    self.record_outcome(results_writer, matric, 'failed',
+                                        time.perf_counter() - started, e)
+
+                finally:
+                    self.rate.release(time.perf_counter() - started, failed, overload)
 
                 # Continue with next matric even if one fails
-                continue
+                if self.outcome_callback:
+                    self.outcome_callback(index, matric, 'failed' if failed else 'success')
 
         # Final progress report
-        self.update_progress(
-            total_count, total_count, f"Completed: {success_count} success, {error_count} errors")
+        if not cancelled:
+            self.update_progress(
+                total_count, total_count, f"Completed: {success_count} success, {error_count} errors")
 
-        print(
-            f"[INFO] Processing complete: {success_count} successful, {error_count} errors")
+        log.info(
+            f"Processing complete: {success_count} successful, {error_count} errors")
 
         return {
             'success_count': success_count,
             'error_count': error_count,
-            'failed_matrics': failed_matrics
+            'failed_matrics': failed_matrics,
+            'cancelled': cancelled,
+            'unprocessed_matrics': unprocessed_matrics
+        }
+
+    def record_outcome(self, results_writer, matric, status, duration, error=None):
+        """
+        Write one record outcome to the results writer, if any.
+
+        Args:
+            results_writer (ResultsWriter): Writer receiving the outcome
+            matric (str): Student matric number
+            status (str): 'success' or 'failed'
+            duration (float): Seconds spent on the record
+            error (Exception): Exception raised for a failed record
+        """
+        if not results_writer:
+            return
+
+        outcome = {
+            'matric_number': matric,
+            'status': status,
+            'duration_seconds': f"{duration:.3f}",
         }
+        if error is not None:
+            outcome['error_class'] = error_class(error)
+            outcome['message'] = str(error)
+            outcome['screenshot'] = os.path.basename(
+                self.last_screenshot) if self.last_screenshot else ''
+
+        try:
+            results_writer.write(outcome)
+        except Exception as e:
+            log.warning(f"Could not write result for {matric}: {str(e)}")
 
-    def save_failed_matrics(self, failed_matrics, sesi, semester, achievement):
-        """Save failed matrics to a CSV file."""
-        if not failed_matrics:
+    @staticmethod
+    def save_failed_matrics(failed_matrics, sesi, semester, achievement, sources=None,
+                            job_id=None, unprocessed_matrics=None):
+        """
+        Save failed matrics to a CSV file.
+
+        The status column tells records that failed ('failed') from records
+        a cancelled run never reached ('not_processed').
+
+        Args:
+            failed_matrics (list): Matric numbers that failed
+            sesi (str): Academic session
+            semester (str): Semester
+            achievement (str): Achievement level
+            sources (dict): Optional mapping of matric number to its
+                'source_file' and 'row' for batch jobs
+            job_id (str): Optional job id added to the filename so that
+                concurrent jobs never share a file
+            unprocessed_matrics (list): Optional matric numbers that were
+                never submitted
+
+        Returns:
+            str: Path to the CSV file, or None if nothing failed
+        """
+        unprocessed_matrics = unprocessed_matrics or []
+        if not failed_matrics and not unprocessed_matrics:
             return None
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
         # Create CSV data
-        columns = ['matric_number', 'timestamp',
+        columns = ['matric_number', 'status', 'timestamp',
                    'sesi', 'semester', 'achievement']
+        if sources:
+            columns += ['source_file', 'row']
         rows_data = []
         current_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        for matric in failed_matrics:
-            rows_data.append([matric, current_timestamp,
-                             sesi, semester, achievement])
+        statuses = [(matric, 'failed') for matric in failed_matrics] + \
+            [(matric, 'not_processed') for matric in unprocessed_matrics]
+        for matric, status in statuses:
+            row = [matric, status, current_timestamp, sesi, semester, achievement]
+            if sources:
+                source = sources.get(matric, {})
+                row += [source.get('source_file', ''), source.get('row', '')]
+            rows_data.append(row)
 
+        suffix = f"_{job_id}" if job_id else ""
         failed_file = os.path.join(
-            UPLOAD_FOLDER, f"failed_matrics_{timestamp}.csv")
+            UPLOAD_FOLDER, f"failed_matrics_{timestamp}{suffix}.csv")
 
         # Write CSV file
         try:
@@ -440,7 +614,11 @@ class MeritAkademikAutomation:
     def quit(self):
         """Close the webdriver."""
         if self.driver:
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
+                ACTIVE_BROWSERS.dec()
 
     def __del__(self):
         """Ensure webdriver is closed when object is destroyed."""
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the file readers in utils.py
+
+Generates synthetic XLSX/CSV files, then reports wall time and peak memory
+for read_excel_file, read_csv_file, get_file_columns and get_matric_list.
+
+Usage:
+    python benchmarks/bench_readers.py --quick
+    python benchmarks/bench_readers.py --save-baseline
+    python benchmarks/bench_readers.py --threshold 0.25
+
+When a baseline file exists, the run exits with status 1 if any reader is
+slower or uses more memory than the baseline by more than the threshold.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl  # noqa: E402
+from utils import (  # noqa: E402
+    LightweightFileReader, get_file_columns, get_matric_list
+)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, '.data')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline_readers.json')
+
+FULL_ROWS = [1000, 10000, 100000, 500000]
+FULL_COLUMNS = [5, 20, 80]
+QUICK_ROWS = [1000, 10000]
+QUICK_COLUMNS = [5, 20]
+
+MATRIC_COLUMN = 'matric_no'
+
+
+def synthetic_rows(rows, columns):
+    """Yield a header and data rows with a matric column first."""
+    yield [MATRIC_COLUMN] + [f"field_{i}" for i in range(1, columns)]
+    for r in range(rows):
+        yield [f"{200000 + r}"] + [f"value_{r}_{c}" for c in range(1, columns)]
+
+
+def generate_file(extension, rows, columns):
+    """
+    Create a synthetic file once and reuse it on later runs.
+
+    Args:
+        extension (str): 'csv' or 'xlsx'
+        rows (int): Number of data rows
+        columns (int): Number of columns
+
+    Returns:
+        str: Path to the generated file
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    filepath = os.path.join(DATA_DIR, f"synthetic_{rows}x{columns}.{extension}")
+    if os.path.exists(filepath):
+        return filepath
+
+    print(f"[INFO] Generating {os.path.basename(filepath)}...")
+    temp_path = filepath + '.part'
+    if extension == 'csv':
+        with open(temp_path, 'w', encoding='utf-8', newline='') as file:
+            csv.writer(file).writerows(synthetic_rows(rows, columns))
+    else:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        for row in synthetic_rows(rows, columns):
+            sheet.append(row)
+        workbook.save(temp_path)
+    os.replace(temp_path, filepath)
+    return filepath
+
+
+def reader_paths(extension):
+    """Reader functions to measure for a file type."""
+    if extension == 'csv':
+        read = LightweightFileReader.read_csv_file
+        read_name = 'read_csv_file'
+    else:
+        read = LightweightFileReader.read_excel_file
+        read_name = 'read_excel_file'
+
+    return [
+        (read_name, read),
+        ('get_file_columns', get_file_columns),
+        ('get_matric_list', lambda path: get_matric_list(path, MATRIC_COLUMN)),
+    ]
+
+
+def measure(func, filepath):
+    """
+    Measure one reader call.
+
+    Wall time and peak memory come from separate calls, because tracemalloc
+    slows down the code it traces.
+
+    Returns:
+        tuple: (wall_seconds, peak_bytes)
+    """
+    started = time.perf_counter()
+    func(filepath)
+    wall = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        func(filepath)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return wall, peak
+
+
+def run_suite(rows_list, columns_list):
+    """
+    Run every reader path over every generated file.
+
+    Returns:
+        dict: Results keyed by 'ext/reader/rowsxcolumns'
+    """
+    results = {}
+    for extension in ('csv', 'xlsx'):
+        for rows in rows_list:
+            for columns in columns_list:
+                filepath = generate_file(extension, rows, columns)
+                for name, func in reader_paths(extension):
+                    wall, peak = measure(func, filepath)
+                    key = f"{extension}/{name}/{rows}x{columns}"
+                    results[key] = {'wall_seconds': round(wall, 4),
+                                    'peak_bytes': peak}
+                    print(f"{key:<42} {wall:>9.3f} s {peak / (1024 * 1024):>10.1f} MB")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline.
+
+    Returns:
+        list: Human-readable descriptions of regressions
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        for metric in ('wall_seconds', 'peak_bytes'):
+            # Ignore noise on measurements too small to matter
+            if metric == 'wall_seconds' and previous[metric] < 0.05:
+                continue
+            limit = previous[metric] * (1 + threshold)
+            if current[metric] > limit:
+                regressions.append(
+                    f"{key} {metric}: {current[metric]} > {previous[metric]} (+{threshold:.0%})")
+    return regressions
+
+
+def main():
+    """Run the benchmark and check it against the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true',
+                        help='only 1k/10k rows and 5/20 columns')
+    parser.add_argument('--rows', type=int, nargs='+',
+                        help='row counts to generate')
+    parser.add_argument('--columns', type=int, nargs='+',
+                        help='column counts to generate')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown or memory growth (default 0.25)')
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help='baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store this run as the new baseline')
+    args = parser.parse_args()
+
+    rows_list = args.rows or (QUICK_ROWS if args.quick else FULL_ROWS)
+    columns_list = args.columns or (QUICK_COLUMNS if args.quick else FULL_COLUMNS)
+
+    print(f"{'benchmark':<42} {'wall':>11} {'peak memory':>13}")
+    results = run_suite(rows_list, columns_list)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"\n[INFO] Baseline saved to {args.baseline}")
+        return True
+
+    if not os.path.exists(args.baseline):
+        print("\n[INFO] No baseline found; run with --save-baseline to create one")
+        return True
+
+    with open(args.baseline, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\n[ERROR] Regressions found:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return False
+
+    print("\n[SUCCESS] No regressions against baseline")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the Merit Akademik automation
+
+Starts the local eKolej stand-in, then drives MeritAkademikAutomation
+against it with real Chrome sessions and reports records per minute and
+p50/p95 per-record latency for every headless engine and concurrency
+setting.
+
+Usage:
+    python benchmarks/bench_throughput.py --records 20
+    python benchmarks/bench_throughput.py --engines new old --concurrency 1 2 4 \\
+        --latency 0.2 --jitter 0.1 --error-rate 0.05 --json results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ekolej_standin import start_server, student_matrics  # noqa: E402
+from tracing import percentile  # noqa: E402
+
+# The benchmark logs in as demo/demo and submits records, so it must never
+# reach anything but the stand-in on this machine
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+
+def check_standin(automation, login_url):
+    """Refuse to drive a session that would not talk to the local stand-in."""
+    if automation.login_url != login_url or \
+            urlparse(automation.login_url).hostname not in LOOPBACK_HOSTS:
+        raise Exception(f"Refusing to run against {automation.login_url}; "
+                        f"the benchmark only drives the stand-in at {login_url}")
+
+
+def run_session(automation_class, engine, login_url, matrics, options, latencies, errors):
+    """Log in with one browser and process a share of the records."""
+    automation = None
+    try:
+        automation = automation_class(headless_mode=engine, login_url=login_url)
+        check_standin(automation, login_url)
+        if not automation.login('demo', 'demo'):
+            raise Exception('Login to the stand-in failed')
+        automation.navigate_to_merit_akademik()
+
+        for matric in matrics:
+            started = time.perf_counter()
+            try:
+                automation.process_single_matric(matric, *options)
+            except Exception:
+                errors.append(matric)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        if automation:
+            automation.quit()
+
+
+def run_case(engine, concurrency, records, options, login_url):
+    """
+    Process records with concurrency browser sessions.
+
+    Returns:
+        dict: Throughput and latency figures for the case
+    """
+    from automation import MeritAkademikAutomation
+
+    matrics = student_matrics(records)
+    latencies, errors, failures = [], [], []
+
+    def session(share):
+        try:
+            run_session(MeritAkademikAutomation, engine, login_url, share,
+                        options, latencies, errors)
+        except Exception as e:
+            failures.append(str(e))
+
+    threads = [threading.Thread(target=session, args=(matrics[i::concurrency],))
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    processed = len(latencies)
+    return {
+        'engine': engine,
+        'concurrency': concurrency,
+        'records': processed,
+        'errors': len(errors),
+        'session_failures': failures,
+        'wall_seconds': round(wall, 2),
+        # Includes browser start, login and navigation, like a real job
+        'records_per_minute': round(processed / wall * 60, 1) if wall else None,
+        'p50_seconds': round(percentile(latencies, 50), 3) if latencies else None,
+        'p95_seconds': round(percentile(latencies, 95), 3) if latencies else None,
+    }
+
+
+def main():
+    """Run every engine and concurrency combination and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=20,
+                        help='records per case (default 20)')
+    parser.add_argument('--engines', nargs='+', default=['new'],
+                        choices=['new', 'old', 'off'],
+                        help="headless modes to compare (default new)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1],
+                        help='browser sessions per case (default 1)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='stand-in seconds per request (default 0.05)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='stand-in random +/- seconds per request')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='share of Tambah form loads that fail (0-1)')
+    parser.add_argument('--seed', type=int, default=1,
+                        help='seed for stand-in jitter and errors')
+    parser.add_argument('--json', metavar='FILE',
+                        help='also write the results as JSON')
+    args = parser.parse_args()
+
+    server, state, login_url = start_server(
+        students=args.records, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, seed=args.seed)
+    print(f"[INFO] eKolej stand-in at {login_url}")
+
+    from config import SESI_OPTIONS, SEMESTER_OPTIONS, ACHIEVEMENT_OPTIONS
+    options = (SESI_OPTIONS[0][0], SEMESTER_OPTIONS[0][0], ACHIEVEMENT_OPTIONS[0][0])
+
+    results = []
+    try:
+        for engine in args.engines:
+            for concurrency in args.concurrency:
+                print(f"[INFO] Running engine={engine} concurrency={concurrency}...")
+                results.append(run_case(engine, concurrency, args.records, options,
+                                        login_url))
+    finally:
+        server.shutdown()
+
+    print(f"\n{'engine':<8} {'sessions':>8} {'records':>8} {'errors':>7} "
+          f"{'rec/min':>9} {'p50':>8} {'p95':>8}")
+    for result in results:
+        p50 = f"{result['p50_seconds']:.2f}s" if result['p50_seconds'] is not None else '-'
+        p95 = f"{result['p95_seconds']:.2f}s" if result['p95_seconds'] is not None else '-'
+        print(f"{result['engine']:<8} {result['concurrency']:>8} {result['records']:>8} "
+              f"{result['errors']:>7} {result['records_per_minute'] or 0:>9.1f} "
+              f"{p50:>8} {p95:>8}")
+        for failure in result['session_failures']:
+            print(f"  [ERROR] {failure}")
+
+    print(f"\n[INFO] Stand-in saved {len(state.records)} records, "
+          f"injected {state.injected_errors} errors")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'settings': vars(args), 'results': results}, file, indent=2)
+        print(f"[INFO] Results saved to {args.json}")
+
+    return not any(result['session_failures'] for result in results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the eKolej pages used by automation.py
+
+Serves the login form, the Merit menu and Merit Akademik sub-menu, the
+Tambah button, the a_matric_no/a_session/a_semester/a_achievement form, the
+save link and the record listing, with the same element names and classes
+the automation looks for. Every request can be slowed down and the Tambah
+form can fail on purpose, to measure the automation without the real
+server.
+
+Usage:
+    python benchmarks/ekolej_standin.py --port 8765 --latency 0.2 --jitter 0.1
+    MERIT_LOGIN_URL=http://127.0.0.1:8765/upmid/login.php python run.py
+"""
+import os
+import sys
+import html
+import time
+import uuid
+import random
+import argparse
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SESI_OPTIONS, SEMESTER_OPTIONS, ACHIEVEMENT_OPTIONS  # noqa: E402
+
+LOGIN_PATH = '/upmid/login.php'
+HOME_PATH = '/upmid/index.php'
+MERIT_PATH = '/upmid/merit_akademik.php'
+FORM_PATH = '/upmid/merit_akademik_form.php'
+
+# Records shown in the listing under the Tambah button
+LISTING_ROWS = 20
+
+
+def student_matrics(count):
+    """Matric numbers the stand-in knows, shared with the benchmark."""
+    return [f"{200000 + i}" for i in range(count)]
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>eKolej stand-in</title></head>
+<body>
+{body}
+</body></html>
+"""
+
+LOGIN_BODY = """<form method="post" action="{login_path}">
+  <p>{error}</p>
+  <input type="text" name="user" id="user">
+  <input type="password" name="pass" id="pass">
+  <input type="submit" name="login" value="Login">
+</form>"""
+
+MENU = """<ul class="sidebar">
+  <li><a href="javascript:void(0)" onclick="document.getElementById('meritSub').style.display='block'">
+    <i class="ion-ribbon-b"></i><span>Merit</span><b class="caret"></b></a>
+    <ul class="sub-menu" id="meritSub" style="display:none">
+      <li><a href="{merit_path}">Merit Akademik</a></li>
+    </ul>
+  </li>
+</ul>"""
+
+MERIT_BODY = """{menu}
+<h3>Merit Akademik</h3>
+<button id="btnTambah" class="btn btn-success" onclick="loadForm()">Tambah</button>
+<div id="formContainer"></div>
+<table id="listing">
+  <tr><th>No. Matrik</th><th>Sesi</th><th>Semester</th><th>Pencapaian</th></tr>
+  {rows}
+</table>
+<script>
+  // The real page loads the form over XHR when Tambah is clicked
+  function loadForm() {{
+    fetch('{form_path}').then(function (response) {{
+      return response.text().then(function (text) {{
+        document.getElementById('formContainer').innerHTML =
+          response.ok ? text : '<div class="alert">' + text + '</div>';
+      }});
+    }});
+  }}
+</script>"""
+
+FORM_BODY = """<form method="post" action="{merit_path}" id="meritForm">
+  <select id="a_matric_no" name="a_matric_no">{matrics}</select>
+  <select id="a_session" name="a_session">{sessions}</select>
+  <select id="a_semester" name="a_semester">{semesters}</select>
+  <select id="a_achievement" name="a_achievement">{achievements}</select>
+  <a href="javascript:void(0)" class="btn btn-xs btn-primary"
+     onclick="document.getElementById('meritForm').submit()">Simpan</a>
+</form>"""
+
+
+def options_html(pairs):
+    return ''.join(f'<option value="{html.escape(value)}">{html.escape(label)}</option>'
+                   for value, label in pairs)
+
+
+class StandInState:
+    """Sessions, saved records and behaviour settings shared by handlers."""
+
+    def __init__(self, students=1000, latency=0.0, jitter=0.0, error_rate=0.0,
+                 username='demo', password='demo', seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.username = username
+        self.password = password
+        self.sessions = set()
+        self.records = []
+        self.requests = 0
+        self.injected_errors = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+
+        # The form is the same for every request, so it is rendered once
+        self.form_html = FORM_BODY.format(
+            merit_path=MERIT_PATH,
+            matrics=options_html((m, m) for m in student_matrics(students)),
+            sessions=options_html(SESI_OPTIONS),
+            semesters=options_html(SEMESTER_OPTIONS),
+            achievements=options_html(ACHIEVEMENT_OPTIONS))
+
+    def delay(self):
+        """Sleep for the configured latency plus or minus jitter."""
+        with self.lock:
+            self.requests += 1
+            seconds = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def inject_error(self):
+        """Decide whether this request fails."""
+        with self.lock:
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.injected_errors += 1
+        return failed
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Request handler for the stand-in pages."""
+
+    state = None
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def _session(self):
+        cookies = self.headers.get('Cookie', '')
+        for part in cookies.split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == 'sid' and value in self.state.sessions:
+                return value
+        return None
+
+    def _send(self, status, body, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location, headers=None):
+        self.send_response(303)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _form(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        fields = parse_qs(self.rfile.read(length).decode('utf-8'))
+        return {name: values[0] for name, values in fields.items()}
+
+    def _merit_page(self):
+        with self.state.lock:
+            recent = self.state.records[-LISTING_ROWS:]
+        rows = ''.join('<tr>' + ''.join(f'<td>{html.escape(value)}</td>' for value in record)
+                       + '</tr>' for record in reversed(recent))
+        return PAGE.format(body=MERIT_BODY.format(
+            menu=MENU.format(merit_path=MERIT_PATH), rows=rows, form_path=FORM_PATH))
+
+    def do_GET(self):
+        self.state.delay()
+        path = self.path.split('?')[0]
+
+        if path == LOGIN_PATH:
+            return self._send(200, PAGE.format(body=LOGIN_BODY.format(
+                login_path=LOGIN_PATH, error='')))
+        if path == '/stats':
+            with self.state.lock:
+                stats = (f'{{"records": {len(self.state.records)}, '
+                         f'"requests": {self.state.requests}, '
+                         f'"injected_errors": {self.state.injected_errors}}}')
+            return self._send(200, stats)
+        if not self._session():
+            return self._redirect(LOGIN_PATH)
+
+        if path == HOME_PATH:
+            return self._send(200, PAGE.format(body=MENU.format(merit_path=MERIT_PATH)))
+        if path == MERIT_PATH:
+            return self._send(200, self._merit_page())
+        if path == FORM_PATH:
+            if self.state.inject_error():
+                return self._send(500, 'Ralat pelayan, sila cuba lagi')
+            return self._send(200, self.state.form_html)
+        return self._send(404, 'Not found')
+
+    def do_POST(self):
+        self.state.delay()
+        path = self.path.split('?')[0]
+        form = self._form()
+
+        if path == LOGIN_PATH:
+            if form.get('user') == self.state.username and \
+                    form.get('pass') == self.state.password:
+                session = uuid.uuid4().hex
+                with self.state.lock:
+                    self.state.sessions.add(session)
+                return self._redirect(HOME_PATH, {'Set-Cookie': f'sid={session}; Path=/'})
+            return self._send(200, PAGE.format(body=LOGIN_BODY.format(
+                login_path=LOGIN_PATH, error='Invalid username or password')))
+
+        if not self._session():
+            return self._redirect(LOGIN_PATH)
+        if path == MERIT_PATH:
+            with self.state.lock:
+                self.state.records.append((form.get('a_matric_no', ''),
+                                           form.get('a_session', ''),
+                                           form.get('a_semester', ''),
+                                           form.get('a_achievement', '')))
+            return self._redirect(MERIT_PATH)
+        return self._send(404, 'Not found')
+
+
+def start_server(port=0, **settings):
+    """
+    Start the stand-in in a background thread.
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one
+        **settings: StandInState settings (latency, jitter, error_rate, ...)
+
+    Returns:
+        tuple: (server, state, login_url)
+    """
+    state = StandInState(**settings)
+    handler = type('Handler', (StandInHandler,), {'state': state})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    login_url = f"http://127.0.0.1:{server.server_address[1]}{LOGIN_PATH}"
+    return server, state, login_url
+
+
+def main():
+    """Run the stand-in until interrupted."""
+    parser = argparse.ArgumentParser(description='Local eKolej stand-in server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='random +/- seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='share of Tambah form loads that fail (0-1)')
+    parser.add_argument('--students', type=int, default=1000,
+                        help='matric numbers offered, starting at 200000')
+    parser.add_argument('--seed', type=int, help='seed for jitter and errors')
+    args = parser.parse_args()
+
+    server, _, login_url = start_server(
+        args.port, students=args.students, latency=args.latency,
+        jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    print(f"[INFO] eKolej stand-in at {login_url} (user demo / password demo)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -5,9 +5,13 @@ Build script for Merit Akademik Automation
 import os
 import sys
 import shutil
+import argparse
 import subprocess
 from pathlib import Path
 
+# Where the packed Chrome archive is staged for the spec file
+PAYLOAD_BUILD_DIR = os.path.join('build', 'chrome-payload')
+
 
 def install_requirements():
     """Install Python dependencies."""
@@ -21,8 +25,35 @@ def install_requirements():
         return False
 
 
-def build_executable():
-    """Build the executable using PyInstaller."""
+def package_chrome(mode):
+    """
+    Pack chrome-bin into one verified archive for the executable.
+
+    Args:
+        mode (str): 'embedded', 'external' or 'directory'
+    """
+    if mode == 'directory':
+        return True
+
+    print("[INFO] Packing Chrome payload...")
+    try:
+        from chrome_payload import build_payload
+
+        manifest = build_payload('chrome-bin', PAYLOAD_BUILD_DIR)
+        print(f"[INFO] Chrome {manifest['version']}: {len(manifest['files'])} files")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Failed to pack Chrome: {e}")
+        return False
+
+
+def build_executable(chrome_mode):
+    """
+    Build the executable using PyInstaller.
+
+    Args:
+        chrome_mode (str): How Chrome is shipped; see main()
+    """
     print("[INFO] Building executable...")
     try:
         # Clean up old build and dist directories
@@ -30,9 +61,19 @@ def build_executable():
             if os.path.exists(dir_name):
                 shutil.rmtree(dir_name)
 
+        if not package_chrome(chrome_mode):
+            return False
+
         # Build using spec file
+        env = dict(os.environ, MERIT_CHROME_PAYLOAD=chrome_mode)
         subprocess.check_call(
-            [sys.executable, "-m", "PyInstaller", "build_executable.spec"])
+            [sys.executable, "-m", "PyInstaller", "build_executable.spec"],
+            env=env)
+
+        if chrome_mode == 'external':
+            # Shipped next to the executable, outside the one-file archive
+            shutil.copytree(PAYLOAD_BUILD_DIR,
+                            os.path.join('dist', 'chrome-payload'))
 
         # Single file executable
         exe_path = Path("dist/MeritAkademikAutomation.exe")
@@ -44,6 +85,8 @@ def build_executable():
             print("1. Double-click: dist\\MeritAkademikAutomation.exe")
             print("2. The app will start and open automatically in your browser")
             print("3. If browser doesn't open, go to http://localhost:5000")
+            if chrome_mode == 'external':
+                print("\n[INFO] Ship dist\\chrome-payload next to the executable")
             return True
         else:
             print("[ERROR] Executable not found after build")
@@ -56,6 +99,15 @@ def build_executable():
 
 def main():
     """Main build process."""
+    parser = argparse.ArgumentParser(description='Build the executable')
+    parser.add_argument(
+        '--chrome', choices=['external', 'embedded', 'directory'], default='external',
+        help="ship Chrome as an archive next to the executable (external, the "
+             "default: nothing is unpacked per launch), inside it (embedded, "
+             "extracted by the one-file bootloader on every launch) or as the "
+             "plain chrome-bin directory (directory, also extracted every launch)")
+    args = parser.parse_args()
+
     print("Merit Akademik Automation Builder")
     print("=" * 50)
 
@@ -64,7 +116,7 @@ def main():
         return False
 
     # Build executable
-    if not build_executable():
+    if not build_executable(args.chrome):
         return False
 
     return True
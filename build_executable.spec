@@ -1,7 +1,21 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+import os
+
 block_cipher = None
 
+# Set by build.py: 'external' (the default) leaves the packed Chrome archive
+# next to the executable, 'embedded' bundles it and 'directory' bundles
+# chrome-bin as is. Anything bundled here is extracted by the one-file
+# bootloader on every launch.
+chrome_mode = os.environ.get('MERIT_CHROME_PAYLOAD', 'external')
+if chrome_mode == 'embedded':
+    chrome_datas = [('build/chrome-payload', 'chrome-payload')]
+elif chrome_mode == 'external':
+    chrome_datas = []
+else:
+    chrome_datas = [('chrome-bin', 'chrome-bin')]
+
 a = Analysis(
     ['run.py'],
     pathex=['.'],
@@ -9,8 +23,9 @@ a = Analysis(
     datas=[
         ('data/uploads', 'data/uploads'),
         ('data/screenshots', 'data/screenshots'),
-        ('chrome-bin', 'chrome-bin'),  # Bundle Chrome with the executable
-    ],
+        ('templates', 'templates'),
+        ('static', 'static'),
+    ] + chrome_datas,
     hiddenimports=[
         'selenium.webdriver.common.by',
         'selenium.webdriver.support.ui',
@@ -19,6 +34,7 @@ a = Analysis(
         'openpyxl',
         'werkzeug.utils',
         'flask',
+        'waitress',
         'csv',
     ],
     hookspath=[],
@@ -55,7 +71,6 @@ a = Analysis(
         'cProfile',
         
         # Database libraries (not used)
-        'sqlite3',
         'mysql',
         'psycopg2',
         'pymongo',
@@ -76,7 +91,6 @@ a = Analysis(
         # Misc large modules
         'asyncio',
         'multiprocessing',
-        'concurrent.futures',
         'distutils',
         'setuptools',
         'pip',
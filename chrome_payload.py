@@ -0,0 +1,237 @@
+"""
+Bundled Chrome payload for the Merit Akademik executable
+
+The build packs chrome-bin into one zip archive with a manifest. At runtime
+the archive is unpacked once into CHROME_CACHE_FOLDER/<version>-<hash> and
+every later launch and browser session reuses that directory, instead of
+the one-file executable unpacking the whole browser on every start.
+
+When running from source, or from an older build that still bundles the
+chrome-bin directory, that directory is used directly.
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import zipfile
+import threading
+from config import CHROME_CACHE_FOLDER
+
+PAYLOAD_DIR = 'chrome-payload'
+ARCHIVE_NAME = 'chrome-bin.zip'
+MANIFEST_NAME = 'chrome-bin.json'
+# Written last, so a directory without it is an interrupted unpack
+COMPLETE_MARKER = '.complete.json'
+
+_chrome_dir = None
+_lock = threading.Lock()
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def detect_version(source_dir):
+    """
+    Find the Chrome version of a chrome-bin directory.
+
+    Uses a VERSION file when there is one, otherwise the versioned
+    subdirectory Chrome installs its resources in.
+
+    Returns:
+        str: Version string, or 'unknown'
+    """
+    version_file = os.path.join(source_dir, 'VERSION')
+    if os.path.isfile(version_file):
+        with open(version_file, 'r', encoding='utf-8') as file:
+            return file.read().strip() or 'unknown'
+
+    for name in sorted(os.listdir(source_dir), reverse=True):
+        if re.fullmatch(r'\d+\.\d+\.\d+\.\d+', name) and \
+                os.path.isdir(os.path.join(source_dir, name)):
+            return name
+    return 'unknown'
+
+
+def build_payload(source_dir, output_dir):
+    """
+    Pack a chrome-bin directory into an archive and manifest for the build.
+
+    Args:
+        source_dir (str): chrome-bin directory
+        output_dir (str): Directory receiving the archive and manifest
+
+    Returns:
+        dict: The manifest that was written
+    """
+    if not os.path.isdir(source_dir):
+        raise Exception(f"Chrome directory not found: {source_dir}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    archive_path = os.path.join(output_dir, ARCHIVE_NAME)
+    files = {}
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED,
+                         compresslevel=6) as archive:
+        for root, _, names in os.walk(source_dir):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                relpath = os.path.relpath(path, source_dir).replace(os.sep, '/')
+                archive.write(path, relpath)
+                files[relpath] = os.path.getsize(path)
+
+    manifest = {
+        'version': detect_version(source_dir),
+        'sha256': file_sha256(archive_path),
+        'files': files,
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def find_payload():
+    """
+    Find a packed payload shipped with the executable.
+
+    An external payload next to the executable is preferred, because the
+    one-file bootloader does not have to unpack it on every launch.
+
+    Returns:
+        str: Directory holding the archive and manifest, or None
+    """
+    if not getattr(sys, 'frozen', False):
+        return None
+
+    candidates = [os.path.join(os.path.dirname(sys.executable), PAYLOAD_DIR),
+                  os.path.join(sys._MEIPASS, PAYLOAD_DIR)]
+    for candidate in candidates:
+        if os.path.isfile(os.path.join(candidate, MANIFEST_NAME)):
+            return candidate
+    return None
+
+
+def _is_complete(target, manifest):
+    """Check that an unpacked directory matches the manifest."""
+    marker = os.path.join(target, COMPLETE_MARKER)
+    if not os.path.isfile(marker):
+        return False
+    try:
+        with open(marker, 'r', encoding='utf-8') as file:
+            if json.load(file).get('sha256') != manifest['sha256']:
+                return False
+    except (OSError, ValueError):
+        return False
+
+    # Sizes catch truncated or deleted files without hashing the browser
+    for relpath, size in manifest['files'].items():
+        path = os.path.join(target, relpath)
+        if not os.path.isfile(path) or os.path.getsize(path) != size:
+            return False
+    return True
+
+
+def _unpack(payload_dir, manifest, target):
+    """Verify the archive and unpack it into target."""
+    archive_path = os.path.join(payload_dir, ARCHIVE_NAME)
+    print(f"[INFO] Unpacking Chrome {manifest['version']} to {target}...")
+    if file_sha256(archive_path) != manifest['sha256']:
+        raise Exception(f"Chrome payload checksum mismatch: {archive_path}")
+
+    # Unpack next to the target and rename, so other processes never see
+    # a half-written directory
+    temp_dir = f"{target}.part-{os.getpid()}"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            broken = archive.testzip()
+            if broken:
+                raise Exception(f"Chrome payload is corrupt at {broken}")
+            archive.extractall(temp_dir)
+            # zipfile drops permission bits; restore them so the binaries
+            # stay executable outside Windows
+            for info in archive.infolist():
+                mode = info.external_attr >> 16
+                if mode:
+                    os.chmod(os.path.join(temp_dir, info.filename), mode & 0o777)
+
+        with open(os.path.join(temp_dir, COMPLETE_MARKER), 'w', encoding='utf-8') as file:
+            json.dump({'version': manifest['version'],
+                       'sha256': manifest['sha256']}, file)
+
+        if os.path.isdir(target):
+            # An interrupted or damaged earlier unpack
+            shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.rename(temp_dir, target)
+        except OSError:
+            # Another process finished first; use its copy if it is whole
+            if not _is_complete(target, manifest):
+                raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _remove_old_versions(keep):
+    """Delete unpacked payloads other than the current one."""
+    for name in os.listdir(CHROME_CACHE_FOLDER):
+        path = os.path.join(CHROME_CACHE_FOLDER, name)
+        if path != keep and os.path.isdir(path) and '.part-' not in name:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def get_chrome_dir():
+    """
+    Get the directory holding chrome.exe and chromedriver.exe.
+
+    Unpacks the payload on first use and reuses the cached copy after that.
+
+    Returns:
+        str: Path to the Chrome directory
+
+    Raises:
+        Exception: If the payload cannot be verified or unpacked
+    """
+    global _chrome_dir
+    with _lock:
+        if _chrome_dir:
+            return _chrome_dir
+
+        payload_dir = find_payload()
+        if payload_dir is None:
+            base_path = sys._MEIPASS if getattr(sys, 'frozen', False) else \
+                os.path.dirname(os.path.abspath(__file__))
+            _chrome_dir = os.path.join(base_path, 'chrome-bin')
+            return _chrome_dir
+
+        with open(os.path.join(payload_dir, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+
+        target = os.path.join(CHROME_CACHE_FOLDER,
+                              f"{manifest['version']}-{manifest['sha256'][:12]}")
+        if not _is_complete(target, manifest):
+            os.makedirs(CHROME_CACHE_FOLDER, exist_ok=True)
+            _unpack(payload_dir, manifest, target)
+            _remove_old_versions(target)
+
+        _chrome_dir = target
+        return _chrome_dir
+
+
+def prepare_in_background():
+    """Unpack the payload in a daemon thread so the first job does not wait."""
+    def prepare():
+        try:
+            get_chrome_dir()
+        except Exception as e:
+            print(f"[WARNING] Could not prepare Chrome: {str(e)}")
+
+    if find_payload():
+        threading.Thread(target=prepare, daemon=True).start()
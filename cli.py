@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Command-line batch runner for Merit Akademik automation
+
+Processes matric numbers from one or more XLSX/CSV files without starting
+the web application, for cron jobs and scripts. Credentials are read from
+MERIT_USERNAME / MERIT_PASSWORD, or asked for on a terminal.
+
+Usage:
+    python cli.py students.xlsx --column matric_no --sesi 2024/2025 \\
+        --semester 1 --achievement "..." --workers 2
+
+Exit status:
+    0  every record was submitted
+    1  some records failed; they are listed in the failed matrics file
+    2  bad arguments or input file
+    3  no browser session could log in, or the run stopped on an error
+    130  interrupted; records not reached are in the failed matrics file
+"""
+import os
+import sys
+import time
+import getpass
+import argparse
+import threading
+
+EXIT_OK = 0
+EXIT_RECORD_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_FATAL = 3
+EXIT_INTERRUPTED = 130
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Submit Merit Akademik records from XLSX/CSV files')
+    parser.add_argument('files', nargs='+', help='XLSX or CSV files')
+    parser.add_argument('--column', required=True,
+                        help='column holding the matric numbers')
+    parser.add_argument('--sesi', required=True, help='academic session')
+    parser.add_argument('--semester', required=True, help='semester')
+    parser.add_argument('--achievement', required=True,
+                        help='achievement level')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='browser sessions to open; the rate controller runs up '
+                             'to this many at once (default 1)')
+    parser.add_argument('--username', default=os.environ.get('MERIT_USERNAME'),
+                        help='eKolej username (default $MERIT_USERNAME)')
+    parser.add_argument('--no-xlsx', action='store_true',
+                        help='only write the CSV results file')
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    return args
+
+
+def read_credentials(args):
+    """
+    Get the eKolej credentials.
+
+    The password is never taken from the command line, where other users
+    could see it in the process list.
+
+    Returns:
+        tuple: (username, password), or None when one is missing
+    """
+    username = args.username
+    password = os.environ.get('MERIT_PASSWORD')
+    if sys.stdin.isatty():
+        username = username or input('Username: ').strip()
+        password = password or getpass.getpass('Password: ')
+    if not username or not password:
+        return None
+    return username, password
+
+
+class ProgressPrinter:
+    """Print one line per record with overall rate and ETA."""
+
+    def __init__(self, total, results_writer):
+        from progress import ProgressStore
+
+        self.total = total
+        self.results_writer = results_writer
+        self.progress = ProgressStore(total)
+        self.progress.start()
+        self._lock = threading.Lock()
+
+    def __call__(self, current, total, message):
+        # Every worker reports its own shard; the results file has the
+        # overall count of finished records
+        done = self.results_writer.row_count
+        with self._lock:
+            self.progress.update(done, self.total, message)
+            data = self.progress.snapshot()
+
+        percent = done * 100 // self.total if self.total else 100
+        rate = f"{data['records_per_minute']}/min" if data['records_per_minute'] else '-'
+        eta = format_seconds(data['eta_seconds']) if data['eta_seconds'] is not None else '-'
+        print(f"[PROGRESS] {done}/{self.total} ({percent}%) {rate} ETA {eta} - {message}",
+              flush=True)
+
+
+def format_seconds(seconds):
+    """Format a duration as 1h02m, 4m05s or 12s."""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def run_worker(shard, args, credentials, control, results_writer, printer, tracer,
+               evidence, rate, outcome):
+    """
+    Log in with one browser session and process a shard of the batch.
+
+    Args:
+        shard (list): Matric numbers for this session
+        args (argparse.Namespace): Parsed arguments
+        credentials (tuple): (username, password)
+        control (JobControl): Shared cancel flag
+        results_writer (ResultsWriter): Shared results file
+        printer (ProgressPrinter): Progress callback
+        tracer (Tracer): Shared step trace
+        evidence (EvidenceRecorder): Shared failure evidence budget
+        rate (RateController): Shared submission slots and pacing
+        outcome (dict): Filled with this worker's results
+    """
+    from automation import MeritAkademikAutomation
+
+    outcome.update(failed_matrics=[], unprocessed_matrics=list(shard),
+                   success_count=0, error_count=0, logged_in=False)
+    automation = None
+    try:
+        automation = MeritAkademikAutomation(tracer=tracer, evidence=evidence, rate=rate)
+        automation.set_control(control)
+        automation.set_progress_callback(printer)
+
+        if not automation.login(*credentials):
+            print("[ERROR] Login failed. Please check your credentials.", flush=True)
+            return
+        outcome['logged_in'] = True
+        automation.navigate_to_merit_akademik()
+
+        results = automation.process_matric_list(
+            shard, args.sesi, args.semester, args.achievement,
+            results_writer=results_writer)
+        outcome.update(results)
+    except Exception as e:
+        print(f"[ERROR] {str(e)}", flush=True)
+        outcome['error'] = str(e)
+    finally:
+        if automation:
+            automation.quit()
+
+
+def main(argv=None):
+    """
+    Run a batch from the command line.
+
+    Returns:
+        int: Process exit status, see the module docstring
+    """
+    args = parse_args(argv)
+
+    # Read the input before starting any browser, so bad files fail fast
+    from utils import merge_matric_lists
+    try:
+        missing = [path for path in args.files if not os.path.isfile(path)]
+        if missing:
+            raise Exception(f"File not found: {', '.join(missing)}")
+        work_list, duplicates = merge_matric_lists(args.files, args.column)
+    except Exception as e:
+        print(f"[ERROR] {str(e)}", file=sys.stderr)
+        return EXIT_USAGE
+    if not work_list:
+        print("[ERROR] No valid matric numbers found in the selected column.",
+              file=sys.stderr)
+        return EXIT_USAGE
+    if duplicates:
+        print(f"[WARNING] Skipped {len(duplicates)} duplicate matric numbers")
+
+    credentials = read_credentials(args)
+    if not credentials:
+        print("[ERROR] Set MERIT_USERNAME and MERIT_PASSWORD, or run from a terminal",
+              file=sys.stderr)
+        return EXIT_USAGE
+
+    from jobs import JobControl
+    from results import ResultsWriter
+    from tracing import Tracer, format_summary
+    from evidence import EvidenceRecorder
+    from pacing import RateController
+
+    matric_list = [entry['matric'] for entry in work_list]
+    sources = {entry['matric']: entry for entry in work_list}
+    workers = min(args.workers, len(matric_list))
+    shards = [matric_list[i::workers] for i in range(workers)]
+
+    print(f"[INFO] Processing {len(matric_list)} matric numbers with {workers} browser session(s)")
+    started = time.monotonic()
+    results_writer = ResultsWriter(prefix='results_cli', xlsx=not args.no_xlsx)
+    printer = ProgressPrinter(len(matric_list), results_writer)
+    control = JobControl()
+    tracer = Tracer()
+    evidence = EvidenceRecorder()
+    rate = RateController(max_concurrency=workers)
+    outcomes = [{} for _ in shards]
+    threads = [threading.Thread(target=run_worker, daemon=True,
+                                args=(shard, args, credentials, control,
+                                      results_writer, printer, tracer, evidence,
+                                      rate, outcome))
+               for shard, outcome in zip(shards, outcomes)]
+
+    interrupted = False
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        # Let each session finish its current record, then stop
+        interrupted = True
+        print("\n[WARNING] Interrupted, stopping after the current records...", flush=True)
+        control.cancel()
+        for thread in threads:
+            thread.join()
+    finally:
+        results_writer.close()
+        evidence.flush()
+
+    success_count = sum(outcome.get('success_count', 0) for outcome in outcomes)
+    failed = [matric for outcome in outcomes
+              for matric in outcome.get('failed_matrics', [])]
+    unprocessed = [matric for outcome in outcomes
+                   for matric in outcome.get('unprocessed_matrics', [])]
+
+    failed_file = None
+    if failed or unprocessed:
+        from automation import MeritAkademikAutomation
+        failed_file = MeritAkademikAutomation.save_failed_matrics(
+            failed, args.sesi, args.semester, args.achievement,
+            sources=sources, unprocessed_matrics=unprocessed)
+
+    print(f"[INFO] Finished in {format_seconds(time.monotonic() - started)}: "
+          f"{success_count} successful, {len(failed)} errors, {len(unprocessed)} not processed")
+    print(f"[INFO] Results: {results_writer.csv_path}")
+    if results_writer.xlsx_path:
+        print(f"[INFO] Results: {results_writer.xlsx_path}")
+    if failed_file:
+        print(f"[INFO] Failed matrics: {failed_file}")
+    if rate.adjustments:
+        state = rate.snapshot()
+        print(f"[INFO] Rate control: {state['adjustments']} adjustments, ended at "
+              f"{state['concurrency']}/{workers} sessions with "
+              f"{state['delay_seconds']}s between records")
+
+    summary = tracer.summary()
+    if summary:
+        trace_file = tracer.save(
+            results_writer.csv_path.replace('results_cli_', 'trace_cli_')[:-4] + '.json')
+        print(f"[INFO] Step trace: {trace_file}")
+        for line in format_summary(summary):
+            print(f"  {line}")
+
+    if interrupted:
+        return EXIT_INTERRUPTED
+    if not any(outcome.get('logged_in') for outcome in outcomes) or \
+            any(outcome.get('error') for outcome in outcomes):
+        return EXIT_FATAL
+    if failed or unprocessed:
+        return EXIT_RECORD_ERRORS
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,7 @@ APP_TITLE = f"Merit Akademik Automation System v{APP_VERSION}"
 # Application settings
 SECRET_KEY = 'merit-akademik-automation'
 DEBUG = False  # Set to False for production
+API_TOKEN = os.environ.get('MERIT_API_TOKEN')  # Bearer token for /api and /metrics only; the web page routes stay open
 
 # Folder configurations - Dynamic path for executable
 
@@ -29,15 +30,112 @@ def get_base_path():
 BASE_PATH = get_base_path()
 UPLOAD_FOLDER = os.path.join(BASE_PATH, 'data', 'uploads')
 SCREENSHOTS_FOLDER = os.path.join(BASE_PATH, 'data', 'screenshots')
+PREVIEW_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, '.preview')
+CHROME_CACHE_FOLDER = os.path.join(BASE_PATH, 'data', 'chrome')  # Unpacked browser of the executable
+LOG_FOLDER = os.path.join(BASE_PATH, 'data', 'logs')  # JSON-lines log of each job
 ALLOWED_EXTENSIONS = {'xlsx', 'csv'}
 
+# Batch upload settings
+MAX_UPLOAD_SIZE_MB = 200  # Set to None to accept uploads of any size
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read per chunk while saving uploads
+
+# File preview settings
+ROW_INDEX_STRIDE = 64  # Keep the byte offset of every Nth row
+ROW_INDEX_CACHE_SIZE = 16  # Number of file indexes kept in memory
+PREVIEW_MAX_ROWS = 500  # Largest page the preview endpoint returns
+
+# Job settings
+MAX_CONCURRENT_JOBS = 2  # Jobs (browsers) running side by side
+MAX_QUEUED_JOBS = 10  # Jobs allowed to wait for a free slot
+JOB_HISTORY_LIMIT = 50  # Finished jobs kept for /jobs
+JOB_LOG_LINES = 500  # Log lines kept per job
+
+# 'thread' runs jobs inside the web process; 'sqlite' queues them in
+# JOB_DB_PATH for separate worker processes (python worker.py)
+JOB_BACKEND = 'thread'
+JOB_DB_PATH = os.path.join(BASE_PATH, 'data', 'jobs.sqlite3')
+JOB_LEASE_SECONDS = 60  # A running job is reclaimed if not renewed in time
+JOB_POLL_SECONDS = 1  # How often workers and streams check the queue
+JOB_MAX_ATTEMPTS = 3  # Claims of one job before it is marked failed
+
+# Progress settings
+ETA_WINDOW = 20  # Records averaged for throughput and ETA
+
+# Progress streaming settings
+SSE_HEARTBEAT_SECONDS = 15  # Idle time before a keep-alive comment is sent
+SSE_RETRY_MS = 2000  # Browser reconnect delay after a dropped stream
+PROGRESS_EVENT_BACKLOG = 200  # Events kept for reconnecting clients
+
+# Web server settings (waitress)
+SERVER_HOST = '0.0.0.0'
+SERVER_PORT = 5000
+SERVER_THREADS = 16  # Request threads; every open progress stream holds one
+SERVER_CONNECTION_LIMIT = 100  # Open connections accepted before new ones wait
+SERVER_CHANNEL_TIMEOUT = 120  # Seconds an idle keep-alive connection stays open
+
 # eKolej system settings
-LOGIN_URL = "https://ekolej.upm.edu.my/upmid/login.php"
+# MERIT_LOGIN_URL points the automation at another server, such as the
+# local stand-in in benchmarks/ekolej_standin.py
+LOGIN_URL = os.environ.get('MERIT_LOGIN_URL', "https://ekolej.upm.edu.my/upmid/login.php")
 
 # Selenium settings
 SELENIUM_TIMEOUT = 10
 SELENIUM_WAIT_TIME = 1
 SELENIUM_HEADLESS = True  # Set to True for production
+SELENIUM_HEADLESS_MODE = 'new'  # 'new' uses --headless=new, 'old' the legacy --headless, 'off' shows the window
+CHROME_BINARY = os.environ.get('MERIT_CHROME')  # None searches bundled, then system Chrome
+CHROMEDRIVER_PATH = os.environ.get('MERIT_CHROMEDRIVER')  # None searches next to Chrome, then PATH
+DRIVER_CACHE_FILE = os.path.join(BASE_PATH, 'data', 'driver.json')  # Last resolved Chrome/driver pair
+SESSION_KEEPALIVE_SECONDS = 120  # Keep a paused run's eKolej session alive
+
+# Step trace settings
+TRACE_MAX_EVENTS = 200000  # Step spans kept per job trace file
+
+# Failure evidence settings
+EVIDENCE_MODE = 'screenshot'  # Evidence on failures: 'screenshot', 'dom', 'both' or 'off'
+EVIDENCE_SCREENSHOT_FORMAT = 'jpeg'  # 'jpeg' (faster to encode) or 'png'
+EVIDENCE_JPEG_QUALITY = 70  # JPEG screenshot quality, 1-100
+EVIDENCE_MAX_FILES = 50  # Evidence files kept per run
+EVIDENCE_MAX_MB = 25  # Evidence megabytes kept per run
+EVIDENCE_QUEUE_SIZE = 32  # Captures waiting for the background writer
+
+# Data retention settings
+RETENTION_INTERVAL_SECONDS = 600  # Seconds between background cleanups of data folders
+RETENTION_MIN_AGE_MINUTES = 60  # Files younger than this are never removed
+UPLOAD_RETENTION_MB = 2048  # Size cap of data/uploads; None for no cap
+UPLOAD_RETENTION_DAYS = 30  # Age cap of uploads, results and failed matrics; None for no cap
+SCREENSHOT_RETENTION_MB = 200  # Size cap of data/screenshots; None for no cap
+SCREENSHOT_RETENTION_DAYS = 14  # Age cap of failure evidence; None for no cap
+LOG_RETENTION_MB = 200  # Size cap of data/logs; None for no cap
+LOG_RETENTION_DAYS = 30  # Age cap of job logs; None for no cap
+
+# Logging settings
+LOG_LEVEL = os.environ.get('MERIT_LOG_LEVEL', 'INFO')  # DEBUG, INFO, WARNING or ERROR
+LOG_TAIL_POLL_SECONDS = 0.5  # How often a live log tail checks for new lines
+
+# Profiling settings
+PROFILE_INTERVAL_SECONDS = 0.01  # Time between stack samples of a profiled job
+PROFILE_DEFAULT_SECONDS = 60  # Profile window when a request gives none
+PROFILE_MAX_SECONDS = 600  # Longest profile window
+PROFILE_TOP_FUNCTIONS = 10  # Functions listed per step in a profile summary
+
+# Adaptive pacing settings
+RATE_CONTROL = True  # Adapt the pause between records (and CLI session concurrency) to eKolej's responses
+RATE_WINDOW = 10  # Records judged together before the rate changes
+RATE_MAX_FAILURE_RATE = 0.3  # The rate only rises while a window's overload failure rate is below this
+RATE_MIN_CONCURRENCY = 1  # Fewest sessions left submitting when eKolej is overloaded
+RATE_MIN_DELAY_SECONDS = 0  # Shortest pause before each record
+RATE_MAX_DELAY_SECONDS = 10  # Longest pause before each record
+RATE_DELAY_STEP_SECONDS = 0.5  # Pause removed after a healthy window
+RATE_BACKOFF_FACTOR = 2  # Concurrency divided, or pause multiplied, when overloaded
+RATE_LATENCY_FACTOR = 1.5  # Median record time above the best window's times this means overload
+RATE_FAILURE_TOLERANCE = 0.1  # Overload failure rate above the best window's plus this means overload
+RATE_BASELINE_WINDOWS = 6  # Recent windows the best failure rate and median are taken from
+RATE_PROBE_WINDOWS = 3  # Overloaded windows in a row before the rate is raised one step anyway
+
+# Metrics settings
+METRICS_STEP_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)  # /metrics step latency buckets, seconds
+METRICS_REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # /metrics request and parse buckets, seconds
 
 # Dynamic options generation
 
@@ -91,7 +189,7 @@ ACHIEVEMENT_OPTIONS = [
 
 def create_directories():
     """Create required directories if they don't exist."""
-    for folder in [UPLOAD_FOLDER, SCREENSHOTS_FOLDER]:
+    for folder in [UPLOAD_FOLDER, SCREENSHOTS_FOLDER, LOG_FOLDER]:
         if not os.path.exists(folder):
             os.makedirs(folder, exist_ok=True)
 
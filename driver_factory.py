@@ -0,0 +1,298 @@
+"""
+Chrome WebDriver factory for Merit Akademik automation
+
+Finds a Chrome/Chromium binary and a matching chromedriver for the current
+platform, checks that their major versions agree and remembers the pair,
+so browser sessions after the first one skip the search. Chrome options
+are also built once and shared by every session.
+
+Search order:
+    1. CHROME_BINARY / CHROMEDRIVER_PATH from config (or the environment);
+       when only one is set, the other is found as described there
+    2. The bundled chrome-bin directory, or its unpacked cache
+    3. Chrome or Chromium installed on the system
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import platform
+import threading
+import subprocess
+from config import (
+    CHROME_BINARY, CHROMEDRIVER_PATH, DRIVER_CACHE_FILE,
+    SELENIUM_HEADLESS, SELENIUM_HEADLESS_MODE, SELENIUM_WAIT_TIME
+)
+from logs import get_logger
+
+# Binary names inside the bundled chrome-bin directory
+BUNDLED_NAMES = {
+    'Windows': ('chrome.exe', 'chromedriver.exe'),
+    'Darwin': (os.path.join('Google Chrome for Testing.app', 'Contents', 'MacOS',
+                            'Google Chrome for Testing'), 'chromedriver'),
+    'Linux': ('chrome', 'chromedriver'),
+}
+
+# Executables looked up on PATH, in order of preference
+SYSTEM_BROWSERS = ('google-chrome', 'google-chrome-stable', 'chromium',
+                   'chromium-browser', 'chrome')
+SYSTEM_BROWSER_PATHS = {
+    'Windows': [os.path.join(os.environ.get(var, ''), 'Google', 'Chrome', 'Application', 'chrome.exe')
+                for var in ('PROGRAMFILES', 'PROGRAMFILES(X86)', 'LOCALAPPDATA')],
+    'Darwin': ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+               '/Applications/Chromium.app/Contents/MacOS/Chromium'],
+    'Linux': [],
+}
+
+VERSION_TIMEOUT_SECONDS = 10
+
+log = get_logger(__name__)
+
+_pair = None
+_options = {}
+_lock = threading.Lock()
+
+
+def get_version(path, browser=False):
+    """
+    Read the version of a Chrome or chromedriver binary.
+
+    Chrome on Windows opens a window instead of printing its version, so
+    the versioned directory next to chrome.exe is used there.
+
+    Args:
+        path (str): Path to the binary
+        browser (bool): The binary is Chrome rather than chromedriver
+
+    Returns:
+        str: Version such as '120.0.6099.109', or None if unknown
+    """
+    try:
+        if browser and platform.system() == 'Windows':
+            raise OSError('chrome.exe does not print its version')
+        output = subprocess.run([path, '--version'], capture_output=True, text=True,
+                                timeout=VERSION_TIMEOUT_SECONDS).stdout
+        match = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
+        if match:
+            return match.group(1)
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+    from chrome_payload import detect_version
+    version = detect_version(os.path.dirname(path))
+    return None if version == 'unknown' else version
+
+
+def _major(version):
+    return version.split('.')[0] if version else None
+
+
+def _system_chrome(system):
+    """Path of Chrome or Chromium installed on the system, or None."""
+    chrome = next((found for found in map(shutil.which, SYSTEM_BROWSERS) if found), None)
+    if not chrome:
+        chrome = next((path for path in SYSTEM_BROWSER_PATHS.get(system, [])
+                       if os.path.isfile(path)), None)
+    return chrome
+
+
+def _candidates():
+    """Yield (source, chrome, chromedriver) pairs to try, best first."""
+    system = platform.system()
+    chrome_name, driver_name = BUNDLED_NAMES.get(system, BUNDLED_NAMES['Linux'])
+
+    from chrome_payload import get_chrome_dir
+    bundled = get_chrome_dir()
+    bundled_chrome = os.path.join(bundled, chrome_name)
+
+    if CHROME_BINARY and CHROMEDRIVER_PATH:
+        yield 'configured', CHROME_BINARY, CHROMEDRIVER_PATH
+    elif CHROME_BINARY:
+        # The driver that came with the configured Chrome, else one on PATH
+        beside = os.path.join(os.path.dirname(CHROME_BINARY), driver_name)
+        yield 'configured', CHROME_BINARY, beside if os.path.isfile(beside) \
+            else shutil.which(driver_name)
+    elif CHROMEDRIVER_PATH:
+        yield 'configured driver, bundled Chrome', bundled_chrome, CHROMEDRIVER_PATH
+        yield 'configured driver, system Chrome', _system_chrome(system), CHROMEDRIVER_PATH
+
+    yield 'bundled', bundled_chrome, os.path.join(bundled, driver_name)
+    yield 'system', _system_chrome(system), shutil.which(driver_name)
+
+
+def _load_cached_pair():
+    """Reuse a pair resolved by an earlier process if the binaries are unchanged."""
+    try:
+        with open(DRIVER_CACHE_FILE, 'r', encoding='utf-8') as file:
+            cached = json.load(file)
+        if cached['configured'] != [CHROME_BINARY, CHROMEDRIVER_PATH]:
+            return None
+        for key in ('chrome', 'chromedriver'):
+            entry = cached[key]
+            if os.path.getmtime(entry['path']) != entry['mtime']:
+                return None
+        return cached
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_cached_pair(pair):
+    try:
+        os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+        with open(DRIVER_CACHE_FILE, 'w', encoding='utf-8') as file:
+            json.dump(pair, file, indent=2)
+    except OSError:
+        pass  # The cache only saves time on the next start
+
+
+def resolve_browser():
+    """
+    Find a Chrome binary and a chromedriver with the same major version.
+
+    Returns:
+        dict: 'source', plus 'chrome' and 'chromedriver' entries with the
+            path, version and mtime of each binary
+
+    Raises:
+        FileNotFoundError: If no usable pair was found
+    """
+    global _pair
+    with _lock:
+        if _pair:
+            return _pair
+
+        cached = _load_cached_pair()
+        if cached:
+            _pair = cached
+            return _pair
+
+        problems = []
+        for source, chrome, driver in _candidates():
+            if not chrome or not os.path.isfile(chrome):
+                problems.append(f"{source}: Chrome not found" + (f" at {chrome}" if chrome else ''))
+                continue
+            if not driver or not os.path.isfile(driver):
+                problems.append(f"{source}: ChromeDriver not found" + (f" at {driver}" if driver else ''))
+                continue
+
+            chrome_version, driver_version = get_version(chrome, browser=True), get_version(driver)
+            if chrome_version and driver_version and \
+                    _major(chrome_version) != _major(driver_version):
+                problems.append(f"{source}: Chrome {chrome_version} does not match "
+                                f"ChromeDriver {driver_version}")
+                continue
+
+            _pair = {
+                'source': source,
+                'configured': [CHROME_BINARY, CHROMEDRIVER_PATH],
+                'chrome': {'path': chrome, 'version': chrome_version,
+                           'mtime': os.path.getmtime(chrome)},
+                'chromedriver': {'path': driver, 'version': driver_version,
+                                 'mtime': os.path.getmtime(driver)},
+            }
+            _save_cached_pair(_pair)
+            return _pair
+
+        raise FileNotFoundError(
+            "No usable Chrome and ChromeDriver found: " + "; ".join(problems))
+
+
+def build_options(headless_mode=None):
+    """
+    Build the Chrome options shared by every browser session.
+
+    Args:
+        headless_mode (str): 'new', 'old' or 'off'; defaults to
+            SELENIUM_HEADLESS_MODE, or 'off' when SELENIUM_HEADLESS is False
+
+    Returns:
+        Options: Chrome options for the resolved binary
+    """
+    from selenium.webdriver.chrome.options import Options
+
+    if headless_mode is None:
+        headless_mode = SELENIUM_HEADLESS_MODE if SELENIUM_HEADLESS else 'off'
+
+    pair = resolve_browser()
+    with _lock:
+        if headless_mode in _options:
+            return _options[headless_mode]
+
+        options = Options()
+        options.binary_location = pair['chrome']['path']
+
+        # Configure Chrome options for better compatibility
+        if headless_mode == 'new':
+            options.add_argument("--headless=new")
+        elif headless_mode == 'old':
+            options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-plugins")
+        options.add_argument("--disable-images")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument(
+            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+
+        # Additional Chrome options for stability and certificate handling
+        options.add_argument("--ignore-certificate-errors")
+        options.add_argument("--allow-insecure-localhost")
+        options.add_argument("--ignore-ssl-errors")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+
+        _options[headless_mode] = options
+        return options
+
+
+def create_driver(headless_mode=None):
+    """
+    Start a new Chrome session.
+
+    Args:
+        headless_mode (str): Headless mode passed to build_options
+
+    Returns:
+        WebDriver: Chrome driver with the implicit wait applied
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    pair = resolve_browser()
+    options = build_options(headless_mode)
+    log.info(f"Using {pair['source']} Chrome {pair['chrome']['version'] or ''} "
+             f"at {pair['chrome']['path']}")
+
+    service = Service(pair['chromedriver']['path'])
+    try:
+        driver = webdriver.Chrome(service=service, options=options)
+    except Exception:
+        # A cached pair may point at a browser that was updated in place
+        forget_browser()
+        raise
+    driver.implicitly_wait(SELENIUM_WAIT_TIME)
+    return driver
+
+
+def forget_browser():
+    """Drop the resolved pair and options so the next session searches again."""
+    global _pair, _options
+    with _lock:
+        _pair = None
+        _options = {}
+    try:
+        os.remove(DRIVER_CACHE_FILE)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    # python driver_factory.py prints the pair a browser session would use
+    try:
+        print(json.dumps(resolve_browser(), indent=2))
+    except FileNotFoundError as e:
+        print(f"[ERROR] {str(e)}")
+        sys.exit(1)
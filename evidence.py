@@ -0,0 +1,175 @@
+"""
+Failure evidence capture for Merit Akademik automation
+
+When a step fails, the automation grabs a screenshot and/or the page HTML
+from the browser and returns straight away; decoding and writing the
+files happens on a background writer thread. Each run has a budget of
+files and bytes, so a batch with many bad matric numbers stops capturing
+instead of slowing down.
+"""
+
+import os
+import queue
+import base64
+import threading
+from config import (
+    SCREENSHOTS_FOLDER, EVIDENCE_MODE, EVIDENCE_MAX_FILES, EVIDENCE_MAX_MB,
+    EVIDENCE_QUEUE_SIZE, EVIDENCE_SCREENSHOT_FORMAT, EVIDENCE_JPEG_QUALITY
+)
+from retention import get_manager as get_retention_manager
+from logs import get_logger
+
+log = get_logger(__name__)
+
+_queue = queue.Queue(maxsize=EVIDENCE_QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _write_files():
+    """Background writer: decode and save queued captures forever."""
+    while True:
+        recorder, path, data = _queue.get()
+        try:
+            if isinstance(data, str):
+                with open(path, 'w', encoding='utf-8') as file:
+                    file.write(data)
+            else:
+                with open(path, 'wb') as file:
+                    file.write(base64.b64decode(data))
+            get_retention_manager().track(path)
+        except Exception as e:
+            log.warning(f"Could not save evidence {os.path.basename(path)}: {str(e)}")
+        finally:
+            recorder._done()
+
+
+def _start_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_files, name='evidence-writer',
+                                       daemon=True)
+            _writer.start()
+
+
+class EvidenceRecorder:
+    """Captures failure evidence for one run, within its file and byte budget."""
+
+    def __init__(self, mode=EVIDENCE_MODE, max_files=EVIDENCE_MAX_FILES,
+                 max_mb=EVIDENCE_MAX_MB):
+        """
+        Start an empty budget.
+
+        Args:
+            mode (str): 'screenshot', 'dom', 'both' or 'off'
+            max_files (int): Files kept for the run
+            max_mb (float): Megabytes kept for the run
+        """
+        self.mode = mode
+        self.max_files = max_files
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.files = 0
+        self.bytes = 0
+        self.skipped = 0
+        self._full = False
+        self._pending = 0
+        self._condition = threading.Condition()
+
+    @property
+    def exhausted(self):
+        """True once the run has used its file or byte budget."""
+        return self._full or self.files >= self.max_files or self.bytes >= self.max_bytes
+
+    def capture(self, driver, name):
+        """
+        Grab evidence from the browser and queue it for writing.
+
+        Never raises: a failing capture must not hide the error that
+        triggered it.
+
+        Args:
+            driver (WebDriver): Browser showing the failed page
+            name (str): File name without extension, such as 'login_error'
+
+        Returns:
+            str: Path the main evidence file is written to, or None if
+                nothing was captured
+        """
+        if self.mode == 'off' or driver is None:
+            return None
+        if self.exhausted:
+            self._skip(name)
+            return None
+
+        captures = []
+        try:
+            if self.mode in ('screenshot', 'both'):
+                captures.append(self._grab_screenshot(driver, name))
+            if self.mode in ('dom', 'both'):
+                captures.append((f"{name}.html", driver.page_source))
+        except Exception as e:
+            log.warning(f"Could not capture evidence {name}: {str(e)}")
+
+        main_path = None
+        for filename, data in captures:
+            # Base64 holds 3 bytes in every 4 characters
+            size = len(data) * 3 // 4 if not isinstance(data, str) else len(data.encode('utf-8'))
+            with self._condition:
+                over_budget = self.exhausted or self.bytes + size > self.max_bytes
+                if over_budget:
+                    self._full = True
+                else:
+                    self.files += 1
+                    self.bytes += size
+                    self._pending += 1
+            if over_budget:
+                self._skip(name)
+                break
+
+            path = os.path.join(SCREENSHOTS_FOLDER, filename)
+            _start_writer()
+            try:
+                _queue.put_nowait((self, path, data))
+            except queue.Full:
+                self._done()
+                log.warning(f"Evidence writer is behind; dropped {filename}")
+                continue
+            main_path = main_path or path
+        return main_path
+
+    @staticmethod
+    def _grab_screenshot(driver, name):
+        """Take a screenshot as base64, as JPEG through DevTools when possible."""
+        if EVIDENCE_SCREENSHOT_FORMAT == 'jpeg' and hasattr(driver, 'execute_cdp_cmd'):
+            try:
+                # JPEG encodes much faster than a full-size PNG in Chrome
+                result = driver.execute_cdp_cmd('Page.captureScreenshot', {
+                    'format': 'jpeg', 'quality': EVIDENCE_JPEG_QUALITY})
+                return f"{name}.jpg", result['data'].encode('ascii')
+            except Exception:
+                pass
+        return f"{name}.png", driver.get_screenshot_as_base64().encode('ascii')
+
+    def _skip(self, name):
+        with self._condition:
+            self.skipped += 1
+            first = self.skipped == 1
+        if first:
+            log.warning(f"Evidence budget reached ({self.files} files); "
+                        f"not capturing {name} or later failures")
+
+    def _done(self):
+        with self._condition:
+            self._pending -= 1
+            self._condition.notify_all()
+
+    def flush(self, timeout=30):
+        """
+        Wait until this run's queued evidence is on disk.
+
+        Returns:
+            bool: True if everything was written within the timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending <= 0, timeout)
@@ -0,0 +1,519 @@
+"""
+Persistent SQLite job queue for Merit Akademik automation runs
+
+The web tier enqueues jobs here and separate worker processes (worker.py)
+claim and run them. A running job holds a lease that its worker renews;
+when a worker or the whole machine restarts, the lease expires and the job
+is claimed again, resuming after the records it had already finished.
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from config import (
+    JOB_DB_PATH, JOB_LEASE_SECONDS, JOB_POLL_SECONDS, JOB_HISTORY_LIMIT,
+    JOB_MAX_ATTEMPTS,
+    MAX_QUEUED_JOBS, SSE_HEARTBEAT_SECONDS, SSE_RETRY_MS,
+    SESSION_KEEPALIVE_SECONDS
+)
+from jobs import (
+    Job, JobControl, JOB_QUEUED, JOB_RUNNING, JOB_PAUSED, JOB_FAILED,
+    JOB_CANCELLED, FINISHED_STATES
+)
+from logs import get_logger
+
+log = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    progress TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    worker_id TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    control TEXT,
+    profile_request TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_logs_job ON job_logs (job_id);
+"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class SQLiteJobQueue:
+    """Durable job storage shared by the web tier and worker processes."""
+
+    def __init__(self, path=JOB_DB_PATH):
+        """
+        Open the queue, creating the database if needed.
+
+        Args:
+            path (str): Path to the SQLite database file
+        """
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+            # Databases created before job controls existed
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if 'control' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN control TEXT")
+            if 'profile_request' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN profile_request TEXT")
+
+    def _connect(self):
+        """Open a connection; one per call keeps threads and processes apart."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def enqueue(self, spec):
+        """
+        Store a new queued job.
+
+        Args:
+            spec (dict): Validated form data plus 'matric_list' and 'sources'
+
+        Returns:
+            str: The new job id
+
+        Raises:
+            Exception: If too many jobs are already waiting
+        """
+        job_id = uuid.uuid4().hex[:12]
+        progress = {'current': 0, 'total': len(spec['matric_list']),
+                    'message': 'Queued', 'completed': False, 'error': None}
+
+        with closing(self._connect()) as conn:
+            queued = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_QUEUED,)).fetchone()[0]
+            if queued >= MAX_QUEUED_JOBS:
+                raise Exception(
+                    f"Too many jobs waiting ({queued}). Please try again later.")
+            conn.execute(
+                "INSERT INTO jobs (id, status, spec, progress, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, json.dumps(spec), json.dumps(progress), _now()))
+        self.append_log(
+            job_id, f"{datetime.now().strftime('%H:%M:%S')} Queued {len(spec['matric_list'])} matric numbers")
+        return job_id
+
+    def claim(self, worker_id):
+        """
+        Claim the oldest queued job, or a running job whose lease expired.
+
+        A job whose workers already died JOB_MAX_ATTEMPTS times is marked
+        failed instead of being claimed again.
+
+        Args:
+            worker_id (str): Id of the claiming worker
+
+        Returns:
+            sqlite3.Row: The claimed job row, or None if there is no work
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? OR (status IN (?, ?) AND lease_until < ?) "
+                    "ORDER BY created_at, rowid LIMIT 1",
+                    (JOB_QUEUED, JOB_RUNNING, JOB_PAUSED, time.time())).fetchone()
+                if not row or row['attempts'] < JOB_MAX_ATTEMPTS:
+                    break
+                self._give_up(conn, row)
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker_id = ?, lease_until = ?, "
+                    "attempts = attempts + 1, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    (JOB_RUNNING, worker_id, time.time() + JOB_LEASE_SECONDS, _now(), row['id']))
+            conn.execute('COMMIT')
+            return row
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _give_up(self, conn, row):
+        """Mark a job failed after too many attempts; called inside claim()."""
+        error = (f"Job stopped after {row['attempts']} attempts; "
+                 f"its worker stopped responding each time")
+        progress = json.loads(row['progress'])
+        progress.update(error=error, completed=True)
+        spec = json.loads(row['spec'])
+        spec.pop('password', None)
+        conn.execute(
+            "UPDATE jobs SET status = ?, progress = ?, spec = ?, version = version + 1, "
+            "finished_at = ?, lease_until = NULL WHERE id = ?",
+            (JOB_FAILED, json.dumps(progress), json.dumps(spec), _now(), row['id']))
+        conn.execute("INSERT INTO job_logs (job_id, line) VALUES (?, ?)",
+                     (row['id'], f"{datetime.now().strftime('%H:%M:%S')} Error: {error}"))
+
+    def renew_lease(self, job_id, worker_id):
+        """Extend the lease of a job the worker is still running."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker_id = ? AND status IN (?, ?)",
+                (time.time() + JOB_LEASE_SECONDS, job_id, worker_id, JOB_RUNNING, JOB_PAUSED))
+
+    def save(self, job_id, status, progress):
+        """Store the current status and progress of a job."""
+        finished_at = _now() if status in FINISHED_STATES else None
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, progress = ?, version = version + 1, "
+                "finished_at = COALESCE(finished_at, ?) WHERE id = ?",
+                (status, json.dumps(progress), finished_at, job_id))
+            if finished_at:
+                # Credentials are only needed while the job runs
+                row = conn.execute(
+                    "SELECT spec FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                spec = json.loads(row['spec'])
+                spec.pop('password', None)
+                conn.execute("UPDATE jobs SET spec = ? WHERE id = ?",
+                             (json.dumps(spec), job_id))
+
+    def set_control(self, job_id, action):
+        """
+        Request pause, resume or cancel for a job.
+
+        A queued job is cancelled right away; a claimed job picks the
+        request up from its worker between records.
+
+        Args:
+            job_id (str): Job to control
+            action (str): 'pause', 'resume' or 'cancel'
+        """
+        with closing(self._connect()) as conn:
+            if action == 'cancel':
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, version = version + 1 "
+                    "WHERE id = ? AND status = ?",
+                    (JOB_CANCELLED, _now(), job_id, JOB_QUEUED))
+                if cursor.rowcount:
+                    return
+            conn.execute("UPDATE jobs SET control = ? WHERE id = ?",
+                         (action, job_id))
+
+    def request_profile(self, job_id, seconds):
+        """
+        Ask the worker of a job to profile it.
+
+        Kept apart from set_control() so a profile request and a pause,
+        resume or cancel never overwrite each other before the worker
+        picks them up.
+
+        Args:
+            job_id (str): Job to profile
+            seconds (float): How long to sample
+        """
+        # '<seconds>:<requested at>', so a repeat is a new request
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET profile_request = ? WHERE id = ?",
+                         (f'{seconds}:{time.time()}', job_id))
+
+    def get_control(self, job_id):
+        """
+        Get the requests stored for a job.
+
+        Returns:
+            tuple: Last control action and last profile request, each None
+                if there was none
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT control, profile_request FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return (row['control'], row['profile_request']) if row else (None, None)
+
+    def append_log(self, job_id, line):
+        """Append one line to a job's log."""
+        with closing(self._connect()) as conn:
+            conn.execute("INSERT INTO job_logs (job_id, line) VALUES (?, ?)",
+                         (job_id, line))
+
+    def get(self, job_id):
+        """Get a job row by id, or None."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def get_logs(self, job_id):
+        """Get all log lines of a job, oldest first."""
+        with closing(self._connect()) as conn:
+            return [row['line'] for row in conn.execute(
+                "SELECT line FROM job_logs WHERE job_id = ? ORDER BY rowid", (job_id,))]
+
+    def counts(self):
+        """Count unfinished jobs by status."""
+        placeholders = ', '.join('?' * len(FINISHED_STATES))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT status, COUNT(*) AS jobs FROM jobs WHERE status NOT IN ({placeholders}) "
+                "GROUP BY status", tuple(FINISHED_STATES)).fetchall()
+        return {row['status']: row['jobs'] for row in rows}
+
+    def list(self, limit=JOB_HISTORY_LIMIT):
+        """Get the most recent job rows, newest first."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                (limit,)).fetchall()
+
+
+class QueuedJob(Job):
+    """A job claimed by a worker that mirrors its state into the queue."""
+
+    def __init__(self, queue, row):
+        """
+        Restore a job from its queue row.
+
+        Args:
+            queue (SQLiteJobQueue): Queue the job was claimed from
+            row (sqlite3.Row): Claimed job row
+        """
+        spec = json.loads(row['spec'])
+        progress = json.loads(row['progress'])
+
+        # A job claimed again after its worker died resumes after the
+        # records it had already finished
+        if row['attempts'] > 0 and progress.get('processed'):
+            spec['resume_from'] = progress['processed']
+
+        super().__init__(spec, job_id=row['id'])
+        self.queue = queue
+        self.progress.restore(progress)
+        self.control = QueuedJobControl(self)
+
+    def log(self, message):
+        super().log(message)
+        self.queue.append_log(self.id, self.logs[-1])
+
+    def publish(self):
+        super().publish()
+        self.queue.save(self.id, self.status, self.progress.snapshot())
+
+
+class QueuedJobControl(JobControl):
+    """JobControl that follows requests stored in the queue by the web tier."""
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+        self._applied = None
+        self._applied_profile = None
+
+    def sync(self):
+        """Apply new control and profile requests from the queue, if any."""
+        action, profile = self.job.queue.get_control(self.job.id)
+        if profile != self._applied_profile:
+            self._applied_profile = profile
+            if profile:
+                self.request_profile(float(profile.split(':')[0]))
+        if action == self._applied:
+            return
+        self._applied = action
+        if action == 'pause':
+            self.pause()
+            self.job.log('Pause requested')
+            self.job.set_status(JOB_PAUSED)
+        elif action == 'resume':
+            self.resume()
+            self.job.log('Resumed')
+            self.job.set_status(JOB_RUNNING)
+        elif action == 'cancel':
+            self.job.log('Cancel requested')
+            self.cancel()
+
+    @property
+    def paused(self):
+        self.sync()
+        return super().paused
+
+    @property
+    def cancelled(self):
+        self.sync()
+        return super().cancelled
+
+    def wait_if_paused(self, keepalive=None, interval=SESSION_KEEPALIVE_SECONDS):
+        """Block while paused, checking the queue for resume or cancel."""
+        waited = 0.0
+        while self.paused:
+            time.sleep(JOB_POLL_SECONDS)
+            waited += JOB_POLL_SECONDS
+            if keepalive and waited >= interval:
+                waited = 0.0
+                keepalive()
+
+
+class StoredJob:
+    """Read-only view of a queued job for the web tier."""
+
+    def __init__(self, queue, row):
+        self.queue = queue
+        self.id = row['id']
+        self.row = row
+
+    @property
+    def status(self):
+        return self.row['status']
+
+    def pause(self):
+        """Ask the worker to pause the job after the record in progress."""
+        if self.status != JOB_RUNNING:
+            raise Exception(f"Job is {self.status}, only running jobs can be paused")
+        self.queue.set_control(self.id, 'pause')
+
+    def resume(self):
+        """Ask the worker to resume a paused job."""
+        if self.status != JOB_PAUSED:
+            raise Exception(f"Job is {self.status}, only paused jobs can be resumed")
+        self.queue.set_control(self.id, 'resume')
+
+    def cancel(self):
+        """Cancel the job; a running job stops after the record in progress."""
+        if self.status in FINISHED_STATES:
+            raise Exception(f"Job is already {self.status}")
+        self.queue.set_control(self.id, 'cancel')
+
+    def profile(self, seconds):
+        """Ask the worker to profile the job, from the next record on."""
+        if self.status in FINISHED_STATES:
+            raise Exception(f"Job is already {self.status}")
+        self.queue.request_profile(self.id, seconds)
+
+    def snapshot(self):
+        """Progress data in the shape the web page expects."""
+        return dict(json.loads(self.row['progress']),
+                    job_id=self.id, status=self.status)
+
+    def to_dict(self, include_logs=False):
+        """
+        Describe the job for the job endpoints.
+
+        Args:
+            include_logs (bool): Include the job log lines
+
+        Returns:
+            dict: Job details without credentials
+        """
+        spec = json.loads(self.row['spec'])
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.row['created_at'],
+            'started_at': self.row['started_at'],
+            'finished_at': self.row['finished_at'],
+            'filenames': spec.get('filenames', []),
+            'matric_column': spec.get('matric_column'),
+            'sesi': spec.get('sesi'),
+            'semester': spec.get('semester'),
+            'achievement': spec.get('achievement'),
+            'progress': self.snapshot(),
+        }
+        if include_logs:
+            data['logs'] = self.queue.get_logs(self.id)
+        return data
+
+    def event_stream(self, last_event_id=0):
+        """
+        Generate Server-Sent Events by polling the stored progress.
+
+        The progress version counter is used as the event id.
+
+        Args:
+            last_event_id (int): Id of the last event the client received
+
+        Yields:
+            str: SSE frames, with a comment heartbeat while idle
+        """
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+
+        idle = 0.0
+        while True:
+            row = self.queue.get(self.id)
+            if row is None:
+                return
+            self.row = row
+
+            if row['version'] != last_event_id:
+                last_event_id = row['version']
+                idle = 0.0
+                yield f"id: {last_event_id}\nevent: progress\ndata: {json.dumps(self.snapshot())}\n\n"
+            elif self.status in FINISHED_STATES:
+                return
+            elif idle >= SSE_HEARTBEAT_SECONDS:
+                idle = 0.0
+                yield ": heartbeat\n\n"
+
+            time.sleep(JOB_POLL_SECONDS)
+            idle += JOB_POLL_SECONDS
+
+
+class SQLiteJobRegistry:
+    """Job registry backed by the SQLite queue; workers do the running."""
+
+    def __init__(self, queue=None):
+        self.queue = queue or SQLiteJobQueue()
+
+    def submit(self, spec):
+        """Queue a new job for the worker processes."""
+        return StoredJob(self.queue, self.queue.get(self.queue.enqueue(spec)))
+
+    def get(self, job_id):
+        """Get a job by id, or None if it is unknown."""
+        row = self.queue.get(job_id)
+        return StoredJob(self.queue, row) if row else None
+
+    def latest(self):
+        """Get the most recently submitted job, or None."""
+        rows = self.queue.list(limit=1)
+        return StoredJob(self.queue, rows[0]) if rows else None
+
+    def list(self):
+        """Get recent jobs, newest first."""
+        return [StoredJob(self.queue, row) for row in self.queue.list()]
+
+    def counts(self):
+        """Count unfinished jobs by status, keyed by (status,) for /metrics."""
+        counts = {(status,): 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_PAUSED)}
+        for status, count in self.queue.counts().items():
+            counts[(status,)] = count
+        return counts
+
+
+class LeaseKeeper(threading.Thread):
+    """Renews a job's lease in the background while a worker runs it."""
+
+    def __init__(self, queue, job_id, worker_id):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(JOB_LEASE_SECONDS / 3):
+            try:
+                self.queue.renew_lease(self.job_id, self.worker_id)
+            except Exception as e:
+                log.warning(f"Could not renew lease for job {self.job_id}: {str(e)}")
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,595 @@
+"""
+Job registry for Merit Akademik automation runs
+"""
+
+import os
+import json
+import uuid
+import threading
+from datetime import datetime
+from collections import OrderedDict, deque
+from config import (
+    MAX_CONCURRENT_JOBS, MAX_QUEUED_JOBS, JOB_HISTORY_LIMIT, JOB_LOG_LINES,
+    SSE_HEARTBEAT_SECONDS, SSE_RETRY_MS, PROGRESS_EVENT_BACKLOG,
+    SESSION_KEEPALIVE_SECONDS, JOB_BACKEND, UPLOAD_FOLDER
+)
+from progress import ProgressStore
+from logs import get_logger, log_context, PROGRESS_LOGGER
+
+progress_log = get_logger(PROGRESS_LOGGER)
+
+# Job lifecycle states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_PAUSED = 'paused'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobControl:
+    """
+    Cooperative pause, resume and cancel flags for a running job.
+
+    The automation checks the flags between records, so a request takes
+    effect once the record in progress is finished.
+    """
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+        # Set by run_job while the job runs; earlier requests wait in pending_profile
+        self.profile_handler = None
+        self.pending_profile = None
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # Wake a paused job so it can stop
+        self._running.set()
+
+    def request_profile(self, seconds):
+        """Profile the job thread for seconds, now or as soon as it starts."""
+        handler = self.profile_handler
+        if handler:
+            handler(seconds)
+        else:
+            self.pending_profile = seconds
+
+    def wait_if_paused(self, keepalive=None, interval=SESSION_KEEPALIVE_SECONDS):
+        """
+        Block while the job is paused.
+
+        Args:
+            keepalive (callable): Called every interval seconds while paused,
+                to keep the eKolej session from timing out
+            interval (float): Seconds between keepalive calls
+        """
+        while not self._running.wait(interval):
+            if keepalive:
+                keepalive()
+
+
+class Job:
+    """A single automation run with its own progress, results and logs."""
+
+    def __init__(self, spec, job_id=None):
+        """
+        Create a queued job.
+
+        Args:
+            spec (dict): Validated form data plus 'matric_list' and 'sources'
+            job_id (str): Existing id when the job is restored from storage
+        """
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.spec = spec
+        self.status = JOB_QUEUED
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = ProgressStore(len(spec['matric_list']), 'Queued')
+        self.logs = deque(maxlen=JOB_LOG_LINES)
+        self.control = JobControl()
+
+        # Every event is a full progress snapshot; a reconnecting client
+        # resumes from the Last-Event-ID it saw
+        self._condition = threading.Condition()
+        self._events = deque(maxlen=PROGRESS_EVENT_BACKLOG)
+        self._event_id = 0
+
+    def log(self, message):
+        """Append a timestamped line to the job log and the job's log file."""
+        self.logs.append(
+            f"{datetime.now().strftime('%H:%M:%S')} {message}")
+        progress_log.info(message, extra={'job': self.id})
+
+    def update_progress(self, current, total, message=""):
+        """Update progress tracking data."""
+        if message and message != self.progress.get('message'):
+            self.log(message)
+        self.progress.update(current, total, message)
+        self.publish()
+
+    def set_status(self, status, error=None):
+        """Move the job to a new lifecycle state."""
+        self.status = status
+        if status == JOB_RUNNING and self.started_at is None:
+            self.started_at = datetime.now()
+            self.progress.start()
+        if error:
+            self.progress.set(error=error)
+            self.log(f"Error: {error}")
+        if status in FINISHED_STATES:
+            self.finished_at = datetime.now()
+            self.progress.finish()
+            # Credentials are only needed while the job runs
+            self.spec.pop('password', None)
+        self.publish()
+
+    def pause(self):
+        """Pause the job after the record in progress."""
+        if self.status != JOB_RUNNING:
+            raise Exception(f"Job is {self.status}, only running jobs can be paused")
+        self.control.pause()
+        self.log('Pause requested')
+        self.set_status(JOB_PAUSED)
+
+    def resume(self):
+        """Resume a paused job."""
+        if self.status != JOB_PAUSED:
+            raise Exception(f"Job is {self.status}, only paused jobs can be resumed")
+        self.control.resume()
+        self.log('Resumed')
+        self.set_status(JOB_RUNNING)
+
+    def cancel(self):
+        """Cancel the job; a running job stops after the record in progress."""
+        if self.status in FINISHED_STATES:
+            raise Exception(f"Job is already {self.status}")
+        self.control.cancel()
+        self.log('Cancel requested')
+        if self.status == JOB_QUEUED:
+            self.set_status(JOB_CANCELLED)
+
+    def profile(self, seconds):
+        """Capture a sampling profile of the job for seconds."""
+        if self.status in FINISHED_STATES:
+            raise Exception(f"Job is already {self.status}")
+        self.control.request_profile(seconds)
+
+    def snapshot(self):
+        """Progress data in the shape the web page expects."""
+        return dict(self.progress.snapshot(), job_id=self.id, status=self.status)
+
+    def publish(self):
+        """Push a snapshot of the progress to connected event streams."""
+        with self._condition:
+            self._event_id += 1
+            self._events.append((self._event_id, json.dumps(self.snapshot())))
+            self._condition.notify_all()
+
+    def event_stream(self, last_event_id=0):
+        """
+        Generate Server-Sent Events for progress updates.
+
+        Args:
+            last_event_id (int): Id of the last event the client received
+
+        Yields:
+            str: SSE frames, with a comment heartbeat while idle
+        """
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+
+        while True:
+            with self._condition:
+                if not self._events or self._events[0][0] > last_event_id + 1 \
+                        or last_event_id > self._event_id:
+                    # Nothing or too much was missed, or the id belongs to an
+                    # earlier job; every event is a full snapshot, so the
+                    # current state is enough
+                    pending = [(self._event_id, json.dumps(self.snapshot()))]
+                else:
+                    pending = [event for event in self._events
+                               if event[0] > last_event_id]
+                if not pending:
+                    if self.status in FINISHED_STATES:
+                        return
+                    self._condition.wait(timeout=SSE_HEARTBEAT_SECONDS)
+                    pending = [event for event in self._events
+                               if event[0] > last_event_id]
+
+            if not pending:
+                yield ": heartbeat\n\n"
+                continue
+
+            for event_id, data in pending:
+                yield f"id: {event_id}\nevent: progress\ndata: {data}\n\n"
+                last_event_id = event_id
+
+    def to_dict(self, include_logs=False):
+        """
+        Describe the job for the job endpoints.
+
+        Args:
+            include_logs (bool): Include the job log lines
+
+        Returns:
+            dict: Job details without credentials
+        """
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(timespec='seconds'),
+            'started_at': self.started_at.isoformat(timespec='seconds') if self.started_at else None,
+            'finished_at': self.finished_at.isoformat(timespec='seconds') if self.finished_at else None,
+            'filenames': self.spec.get('filenames', []),
+            'matric_column': self.spec.get('matric_column'),
+            'sesi': self.spec.get('sesi'),
+            'semester': self.spec.get('semester'),
+            'achievement': self.spec.get('achievement'),
+            'progress': self.snapshot(),
+        }
+        if include_logs:
+            data['logs'] = list(self.logs)
+        return data
+
+
+class JobRegistry:
+    """Keeps track of jobs and runs up to max_concurrent of them at once."""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_JOBS,
+                 max_queued=MAX_QUEUED_JOBS, history_limit=JOB_HISTORY_LIMIT):
+        """
+        Create an empty registry.
+
+        Args:
+            max_concurrent (int): Jobs allowed to run side by side
+            max_queued (int): Jobs allowed to wait for a free slot
+            history_limit (int): Finished jobs kept for inspection
+        """
+        self.max_queued = max_queued
+        self.history_limit = history_limit
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_concurrent)
+
+    def submit(self, spec):
+        """
+        Queue a new job and start it as soon as a slot is free.
+
+        Args:
+            spec (dict): Validated form data plus 'matric_list' and 'sources'
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            Exception: If too many jobs are already waiting
+        """
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values()
+                         if job.status == JOB_QUEUED)
+            if queued >= self.max_queued:
+                raise Exception(
+                    f"Too many jobs waiting ({queued}). Please try again later.")
+
+            job = Job(spec)
+            self._jobs[job.id] = job
+            self._prune()
+
+        job.log(f"Queued {len(spec['matric_list'])} matric numbers")
+        thread = threading.Thread(target=self._run, args=(job,))
+        thread.daemon = True
+        thread.start()
+        return job
+
+    def _run(self, job):
+        """Wait for a free slot, then run the job."""
+        with self._slots:
+            if not job.control.cancelled:
+                run_job(job)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history limit."""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.history_limit)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Get a job by id, or None if it is unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self):
+        """Get the most recently submitted job, or None."""
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+
+    def list(self):
+        """Get all known jobs, newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def counts(self):
+        """Count unfinished jobs by status, keyed by (status,) for /metrics."""
+        counts = {(status,): 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_PAUSED)}
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status not in FINISHED_STATES:
+                    counts[(job.status,)] = counts.get((job.status,), 0) + 1
+        return counts
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Get the job registry for the configured JOB_BACKEND.
+
+    Returns:
+        JobRegistry: In-process registry, or the SQLite-backed registry
+            when JOB_BACKEND is 'sqlite'
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            if JOB_BACKEND == 'sqlite':
+                from job_queue import SQLiteJobRegistry
+                _registry = SQLiteJobRegistry()
+            else:
+                _registry = JobRegistry()
+        return _registry
+
+
+def run_job(job):
+    """
+    Run one automation job from login to results.
+
+    Args:
+        job (Job): Job to run; its progress and results are updated in place
+    """
+    # Everything logged while the job runs goes to its log file
+    with log_context(job=job.id):
+        _run_job(job)
+
+
+def _run_job(job):
+    from automation import MeritAkademikAutomation
+    from results import ResultsWriter
+    from tracing import Tracer
+    from evidence import EvidenceRecorder
+    from profiling import ThreadSampler
+    from pacing import RateController
+
+    spec = job.spec
+    total = len(spec['matric_list'])
+    tracer = Tracer(job.id)
+    evidence = EvidenceRecorder()
+    rate = RateController(on_adjust=lambda state: job.progress.set(rate=state))
+    thread_id = threading.get_ident()
+    profilers = []
+
+    def start_profile(seconds):
+        # Called from the web tier, the queue control or the spec
+        if any(sampler.is_alive() for sampler in profilers):
+            job.log('A profile is already being captured')
+            return
+        sampler = ThreadSampler(thread_id, seconds,
+                                step_of=lambda: tracer.current_step(thread_id),
+                                on_done=lambda done: save_profile(job, done))
+        profilers.append(sampler)
+        job.log(f'Profiling for {sampler.seconds:.0f}s')
+        sampler.start()
+
+    def finish(status, error=None):
+        # Save any profile in progress before the job is reported finished
+        job.control.profile_handler = None
+        for sampler in profilers:
+            sampler.stop()
+            sampler.join()
+        # Screenshots named in the results should exist once the job is over
+        if not evidence.flush():
+            job.log('[WARNING] Some failure evidence is still being written')
+        if evidence.skipped:
+            job.log(f'[WARNING] Evidence budget reached; {evidence.skipped} '
+                    f'failures have no screenshot')
+        # Save the step trace so the final progress event can link to it
+        save_trace(job, tracer)
+        job.set_status(status, error)
+
+    job.control.profile_handler = start_profile
+    if spec.get('profile_seconds') or job.control.pending_profile:
+        start_profile(job.control.pending_profile or spec['profile_seconds'])
+
+    # A job resumed after a restart skips the records it already finished
+    # and keeps their failures and results file
+    resume_from = spec.get('resume_from', 0)
+    matric_list = spec['matric_list'][resume_from:]
+    earlier_failed = list(job.progress.get('failed_so_far') or []) if resume_from else []
+
+    try:
+        job.set_status(JOB_RUNNING)
+        if resume_from:
+            job.update_progress(
+                resume_from, total,
+                f'Resuming after restart, {resume_from} of {total} already processed...')
+        else:
+            job.update_progress(
+                0, total, f'Starting to process {total} matric numbers...')
+
+        # Open the results file first so it can be downloaded mid-run
+        results_writer = ResultsWriter(
+            prefix=f'results_{job.id}',
+            resume_file=job.progress.get('results_file') if resume_from else None)
+        job.progress.set(results_file=os.path.basename(
+            results_writer.csv_path))
+
+        automation = None
+        try:
+            # Initialize automation
+            job.progress.start_phase('driver_start')
+            automation = MeritAkademikAutomation(tracer=tracer, evidence=evidence,
+                                                 rate=rate)
+            automation.set_control(job.control)
+
+            def report_progress(current, _, message):
+                # The automation reports a record just before processing it;
+                # both fields cover the records before it, for a resume
+                job.progress.set(processed=resume_from + max(0, current - 1),
+                                 failed_so_far=earlier_failed + results_writer.failed)
+                job.update_progress(resume_from + current, total, message)
+
+            automation.set_progress_callback(report_progress)
+
+            def record_finished(finished, matric, status):
+                # Stored straight away: a worker that dies while the job
+                # waits between records must not submit this one again
+                job.progress.set(processed=resume_from + finished,
+                                 failed_so_far=earlier_failed + results_writer.failed)
+                job.publish()
+
+            automation.set_outcome_callback(record_finished)
+
+            # Login
+            job.progress.start_phase('login')
+            job.update_progress(resume_from, total, 'Logging in...')
+            if not automation.login(spec['username'], spec['password']):
+                finish(JOB_FAILED, 'Login failed. Please check your credentials.')
+                return
+
+            # Navigate to Merit Akademik page
+            job.progress.start_phase('navigation')
+            job.update_progress(resume_from, total,
+                                'Navigating to Merit Akademik page...')
+            automation.navigate_to_merit_akademik()
+
+            # Process all matric numbers
+            job.progress.start_phase('submission')
+            if job.control.cancelled:
+                results = {'success_count': 0, 'error_count': 0,
+                           'failed_matrics': [], 'cancelled': True,
+                           'unprocessed_matrics': list(matric_list)}
+            else:
+                results = automation.process_matric_list(
+                    matric_list,
+                    spec['sesi'],
+                    spec['semester'],
+                    spec['achievement'],
+                    results_writer=results_writer
+                )
+
+            if resume_from:
+                results['failed_matrics'] = earlier_failed + results['failed_matrics']
+                results['error_count'] += len(earlier_failed)
+                results['success_count'] += resume_from - len(earlier_failed)
+
+            # Save failed matrics to file; a cancelled run also saves the
+            # records it never reached so they can be submitted again
+            failed_file = None
+            unprocessed = results.get('unprocessed_matrics', [])
+            if results['failed_matrics'] or unprocessed:
+                failed_file = automation.save_failed_matrics(
+                    results['failed_matrics'],
+                    spec['sesi'],
+                    spec['semester'],
+                    spec['achievement'],
+                    sources=spec.get('sources'),
+                    job_id=job.id,
+                    unprocessed_matrics=unprocessed
+                )
+
+            # Finish the XLSX copy before reporting completion
+            results_writer.close()
+            if results_writer.xlsx_path:
+                job.progress.set(results_xlsx=os.path.basename(
+                    results_writer.xlsx_path))
+
+            # Store results in progress data
+            job.progress.set(results=results, failed_file=failed_file)
+
+            # Update final progress
+            if results.get('cancelled'):
+                job.update_progress(
+                    total - len(unprocessed), total,
+                    f'Cancelled: {results["success_count"]} successful, {results["error_count"]} errors, '
+                    f'{len(unprocessed)} not processed'
+                )
+                finish(JOB_CANCELLED)
+            else:
+                job.update_progress(
+                    total, total,
+                    f'Completed: {results["success_count"]} successful, {results["error_count"]} errors'
+                )
+                finish(JOB_DONE)
+
+        finally:
+            if automation:
+                automation.quit()
+            results_writer.close()
+
+    except Exception as e:
+        finish(JOB_FAILED, str(e))
+
+
+def save_profile(job, sampler):
+    """
+    Write a finished profile next to the job's results and log its summary.
+
+    Args:
+        job (Job): Job that was profiled
+        sampler (ThreadSampler): Finished capture
+    """
+    from profiling import format_summary
+
+    summary = sampler.summary()
+    try:
+        profile_path = sampler.save(os.path.join(UPLOAD_FOLDER, f'profile_{job.id}.txt'))
+        job.progress.set(profile_file=os.path.basename(profile_path), profile=summary)
+        job.log('Profile:')
+        for line in format_summary(summary):
+            job.log(f'  {line}')
+        job.publish()
+    except Exception as e:
+        job.log(f'[WARNING] {str(e)}')
+
+
+def save_trace(job, tracer):
+    """
+    Write a job's step trace next to its results and log the step timings.
+
+    Args:
+        job (Job): Job the trace belongs to
+        tracer (Tracer): Spans recorded during the run
+    """
+    from tracing import format_summary
+
+    summary = tracer.summary()
+    if not summary:
+        return
+    try:
+        trace_path = tracer.save(os.path.join(UPLOAD_FOLDER, f'trace_{job.id}.json'))
+        job.progress.set(trace_file=os.path.basename(trace_path),
+                         step_timings=summary)
+        job.log('Step timings (p50/p95):')
+        for line in format_summary(summary):
+            job.log(f'  {line}')
+    except Exception as e:
+        job.log(f'Could not save trace: {str(e)}')
@@ -0,0 +1,243 @@
+"""
+Structured logging for Merit Akademik automation
+
+Log calls only put the record on a queue; a listener thread prints it to
+the console and appends it as one JSON object per line to
+data/logs/<job_id>.jsonl when it belongs to a job. Every record carries
+the job and matric number set with log_context(), so a job's lines can be
+followed live with tail_job_log() while the job runs.
+
+Usage:
+    from logs import get_logger, log_context
+    log = get_logger(__name__)
+
+    with log_context(job=job.id):
+        with log_context(matric=matric):
+            log.info("Processing")
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from datetime import datetime
+from collections import OrderedDict
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from config import (
+    LOG_FOLDER, LOG_LEVEL, LOG_TAIL_POLL_SECONDS, SSE_HEARTBEAT_SECONDS,
+    SSE_RETRY_MS
+)
+
+# Between INFO and WARNING, for the automation's [SUCCESS] lines
+SUCCESS = 25
+logging.addLevelName(SUCCESS, 'SUCCESS')
+
+# Job loggers that only feed the job files, because the job's own log
+# already shows these lines in the web page
+PROGRESS_LOGGER = 'merit.progress'
+
+# Job log files kept open by the listener at once
+MAX_OPEN_JOB_LOGS = 16
+
+_job = contextvars.ContextVar('log_job', default=None)
+_matric = contextvars.ContextVar('log_matric', default=None)
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+@contextmanager
+def log_context(**values):
+    """
+    Tag the log records made inside the block.
+
+    Context variables do not follow new threads, so a thread that works
+    for a job opens its own log_context.
+
+    Args:
+        **values: job and/or matric
+    """
+    tokens = []
+    if 'job' in values:
+        tokens.append((_job, _job.set(values['job'])))
+    if 'matric' in values:
+        tokens.append((_matric, _matric.set(values['matric'])))
+    try:
+        yield
+    finally:
+        for variable, token in reversed(tokens):
+            variable.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the job and matric of the calling context onto each record."""
+
+    def filter(self, record):
+        if getattr(record, 'job', None) is None:
+            record.job = _job.get()
+        if getattr(record, 'matric', None) is None:
+            record.matric = _matric.get()
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The '[LEVEL] message' lines the console has always shown."""
+
+    def format(self, record):
+        return f"[{record.levelname}] {record.getMessage()}"
+
+
+class ConsoleFilter(logging.Filter):
+    def filter(self, record):
+        return record.name != PROGRESS_LOGGER
+
+
+def job_log_path(job_id):
+    """Path of a job's JSON-lines log."""
+    return os.path.join(LOG_FOLDER, f"{job_id}.jsonl")
+
+
+def to_json(record):
+    """One JSON log line for a record."""
+    entry = {
+        'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+        'level': record.levelname,
+        'logger': record.name,
+        'job': record.job,
+        'matric': record.matric,
+        'thread': record.threadName,
+        'message': record.getMessage(),
+    }
+    return json.dumps(entry, ensure_ascii=False)
+
+
+class JobFileHandler(logging.Handler):
+    """Append records that belong to a job to that job's .jsonl file."""
+
+    def __init__(self):
+        super().__init__()
+        self._files = OrderedDict()
+
+    def emit(self, record):
+        if not record.job:
+            return
+        try:
+            file = self._files.pop(record.job, None)
+            if file is None:
+                os.makedirs(LOG_FOLDER, exist_ok=True)
+                file = open(job_log_path(record.job), 'a', encoding='utf-8')
+            self._files[record.job] = file
+            while len(self._files) > MAX_OPEN_JOB_LOGS:
+                self._files.popitem(last=False)[1].close()
+
+            file.write(to_json(record) + '\n')
+            # Flushed per line so tail_job_log sees it straight away
+            file.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+        super().close()
+
+
+def setup_logging():
+    """Route the 'merit' loggers through the queue listener; safe to call again."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(ConsoleFormatter())
+        console.addFilter(ConsoleFilter())
+
+        # An unbounded queue, so logging never waits for the console or disk
+        records = queue.Queue(-1)
+        handler = QueueHandler(records)
+        handler.addFilter(ContextFilter())
+
+        logger = logging.getLogger('merit')
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(handler)
+        logger.propagate = False
+
+        _listener = QueueListener(records, console, JobFileHandler(),
+                                  respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name):
+    """
+    Get a logger under 'merit', setting up the handlers on first use.
+
+    Args:
+        name (str): Usually the module's __name__
+    """
+    setup_logging()
+    return logging.getLogger(name if name.startswith('merit') else f"merit.{name}")
+
+
+def tail_job_log(job_id, is_finished, last_event_id=0):
+    """
+    Generate Server-Sent Events for a job's log file as it grows.
+
+    Each event id is the byte offset after its line, so a client that
+    reconnects with Last-Event-ID continues where it stopped.
+
+    Args:
+        job_id (str): Job to follow
+        is_finished (callable): Returns True once the job has finished
+        last_event_id (int): Byte offset to continue from
+
+    Yields:
+        str: 'log' events, a comment heartbeat while idle and an 'end'
+            event when the finished job's log has been sent
+    """
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+
+    path = job_log_path(job_id)
+    offset = last_event_id
+    idle = 0.0
+    finishing = False
+
+    while True:
+        lines = []
+        try:
+            with open(path, 'rb') as file:
+                file.seek(offset)
+                data = file.read()
+            # Leave a partly written last line for the next read
+            complete = data[:data.rfind(b'\n') + 1]
+            for line in complete.splitlines(keepends=True):
+                offset += len(line)
+                lines.append((offset, line.decode('utf-8').strip()))
+        except FileNotFoundError:
+            pass
+
+        if lines:
+            idle = 0.0
+            for event_id, line in lines:
+                yield f"id: {event_id}\nevent: log\ndata: {line}\n\n"
+            continue
+
+        if finishing:
+            yield "event: end\ndata: {}\n\n"
+            return
+        # One more read after the job ends picks up its last lines
+        finishing = is_finished()
+
+        time.sleep(LOG_TAIL_POLL_SECONDS)
+        idle += LOG_TAIL_POLL_SECONDS
+        if idle >= SSE_HEARTBEAT_SECONDS:
+            idle = 0.0
+            yield ": heartbeat\n\n"
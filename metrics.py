@@ -0,0 +1,217 @@
+"""
+Process-wide counters for Merit Akademik automation
+
+The automation, upload handling and web tier update the metrics defined at
+the bottom of this module, and /metrics renders them in the Prometheus text
+exposition format, so throughput and eKolej slowdowns can be charted over
+time. Values live in the process that updates them: with JOB_BACKEND
+'sqlite', record and step metrics come from the worker processes.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from config import METRICS_STEP_BUCKETS, METRICS_REQUEST_BUCKETS
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_metrics = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class for a named metric with an optional set of labels."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        """
+        Create and register a metric.
+
+        Args:
+            name (str): Metric name, such as 'merit_records_total'
+            documentation (str): HELP text
+            labels (tuple): Label names every update must give
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        """Yield (suffix, label pairs, value) for every series."""
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield '', list(zip(self.labels, key)), value
+
+    def render(self):
+        """Render HELP, TYPE and sample lines."""
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        for suffix, pairs, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(pairs)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Value that only goes up."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, or is read from a function at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        """
+        Args:
+            function (callable): Optional; returns a number, or a dict of
+                label tuple to number, each time the metrics are rendered
+        """
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.function is None:
+            yield from super().samples()
+            return
+        try:
+            values = self.function()
+        except Exception:
+            return  # A failing source leaves the gauge out of this scrape
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            yield '', list(zip(self.labels, key)), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=METRICS_STEP_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long a block of code takes."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(series[0]), series[1], series[2])
+                      for key, series in self._values.items()}
+        for key, (counts, count, total) in sorted(values.items()):
+            pairs = list(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield '_bucket', pairs + [('le', _format_value(float(bound)))], cumulative
+            yield '_sum', pairs, round(total, 6)
+            yield '_count', pairs, count
+
+
+def render():
+    """
+    Render every registered metric.
+
+    Returns:
+        str: Metrics in the Prometheus text exposition format
+    """
+    lines = []
+    for metric in list(_metrics):
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Automation (automation.py, tracing.py, pacing.py)
+RECORDS = Counter('merit_records_total',
+                  'Matric numbers processed, by outcome', ('status',))
+FAILURES = Counter('merit_record_failures_total',
+                   'Failed matric numbers, by exception class', ('error_class',))
+STEP_SECONDS = Histogram('merit_step_seconds',
+                         'Time spent in each automation step', ('step',))
+ACTIVE_BROWSERS = Gauge('merit_active_browsers', 'Chrome sessions currently open')
+DRIVER_STARTS = Counter('merit_driver_starts_total',
+                        'Chrome sessions started, including restarts, by result',
+                        ('result',))
+RATE_ADJUSTMENTS = Counter('merit_rate_adjustments_total',
+                           'Submission rate changes by the rate controller, by direction',
+                           ('direction',))
+
+# Uploads (utils.py)
+UPLOAD_PARSE_SECONDS = Histogram('merit_upload_parse_seconds',
+                                 'Time spent reading uploaded files, by stage',
+                                 ('stage',), buckets=METRICS_REQUEST_BUCKETS)
+
+# Web tier (app.py)
+REQUEST_SECONDS = Histogram('merit_http_request_seconds',
+                            'Time to produce a response, by route and method',
+                            ('route', 'method'), buckets=METRICS_REQUEST_BUCKETS)
+REQUESTS = Counter('merit_http_requests_total',
+                   'HTTP responses, by route, method and status',
+                   ('route', 'method', 'status'))
@@ -0,0 +1,205 @@
+"""
+Adaptive pacing of record submissions to eKolej
+
+A RateController sits around the submission loop of every browser session
+in a run. It watches the latency and outcome of each record and, every
+RATE_WINDOW records, compares them with the best of the last
+RATE_BASELINE_WINDOWS windows: more overload failures (timeouts and
+browser errors, not bad data such as an unknown matric number) or a
+clearly slower median means eKolej is struggling and the rate is cut
+multiplicatively. A healthy window raises it additively, but only while
+overload failures stay under RATE_MAX_FAILURE_RATE. After
+RATE_PROBE_WINDOWS overloaded windows in a row the rate is raised one step
+anyway, in case the slowdown has nothing to do with the rate.
+
+The rate is one ladder with two knobs. At the lowest concurrency the
+controller changes the pause before each record; above it, the number of
+sessions allowed to submit at once. A run with one browser only adapts the
+pause.
+"""
+
+import time
+import threading
+from collections import deque
+from config import (
+    RATE_CONTROL, RATE_WINDOW, RATE_MAX_FAILURE_RATE, RATE_MIN_CONCURRENCY,
+    RATE_MIN_DELAY_SECONDS, RATE_MAX_DELAY_SECONDS, RATE_DELAY_STEP_SECONDS,
+    RATE_BACKOFF_FACTOR, RATE_LATENCY_FACTOR, RATE_FAILURE_TOLERANCE,
+    RATE_BASELINE_WINDOWS, RATE_PROBE_WINDOWS, SESSION_KEEPALIVE_SECONDS
+)
+from tracing import percentile
+from metrics import RATE_ADJUSTMENTS
+from logs import get_logger
+
+log = get_logger(__name__)
+
+# How often a session waiting for a free slot checks for cancel
+SLOT_POLL_SECONDS = 1
+
+
+class RateController:
+    """Shared submission slots and pacing for the sessions of one run."""
+
+    def __init__(self, max_concurrency=1, enabled=RATE_CONTROL, on_adjust=None):
+        """
+        Start at full concurrency with the shortest pause.
+
+        Args:
+            max_concurrency (int): Browser sessions in the run, the most
+                that can submit at once
+            enabled (bool): False keeps the starting rate for the whole run
+            on_adjust (callable): Called with snapshot() after each change
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = min(RATE_MIN_CONCURRENCY, self.max_concurrency)
+        self.enabled = enabled
+        self.on_adjust = on_adjust
+        self.concurrency = self.max_concurrency
+        self.delay = RATE_MIN_DELAY_SECONDS
+        self.adjustments = 0
+        self._in_flight = 0
+        self._window = []
+        self._stale = 0
+        # (overload failure rate, median latency) of recent windows; the
+        # best of them is what eKolej manages when it is not overloaded.
+        # Old windows age out, so a lasting change in eKolej's speed
+        # becomes the new normal
+        self._history = deque(maxlen=RATE_BASELINE_WINDOWS)
+        self._overloaded_windows = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, keepalive=None, stop=None):
+        """
+        Wait for a free submission slot, then for the pause before a record.
+
+        Args:
+            keepalive (callable): Called every SESSION_KEEPALIVE_SECONDS
+                while waiting for a slot, to keep the eKolej session alive
+            stop (callable): Returns True when the wait should be abandoned
+
+        Returns:
+            float: Seconds waited, or None if stop() ended the wait; the
+                slot is only held when a number is returned
+        """
+        started = time.perf_counter()
+        last_keepalive = started
+        while True:
+            with self._condition:
+                if self._in_flight < self.concurrency:
+                    self._in_flight += 1
+                    delay = self.delay
+                    break
+                self._condition.wait(SLOT_POLL_SECONDS)
+            if stop and stop():
+                return None
+            if keepalive and time.perf_counter() - last_keepalive >= SESSION_KEEPALIVE_SECONDS:
+                keepalive()
+                last_keepalive = time.perf_counter()
+
+        if delay:
+            time.sleep(delay)
+        return time.perf_counter() - started
+
+    def release(self, duration, failed, overload=False):
+        """
+        Free the slot of a finished record and learn from its outcome.
+
+        Args:
+            duration (float): Seconds the record took, without the pause
+            failed (bool): True if the record failed
+            overload (bool): True if it failed because eKolej or the
+                browser did not keep up; other failures, such as an unknown
+                matric number, say nothing about the rate
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+            if not self.enabled:
+                return
+            if self._stale:
+                # Started before the last change, so says nothing about it
+                self._stale -= 1
+                return
+            self._window.append((duration, failed, overload))
+            if len(self._window) < RATE_WINDOW:
+                return
+            change = self._adjust()
+        if change:
+            log.info(change)
+            if self.on_adjust:
+                self.on_adjust(self.snapshot())
+
+    def _adjust(self):
+        """Move the rate after a full window; called with the lock held."""
+        window, self._window = self._window, []
+        failure_rate = sum(overload for _, _, overload in window) / len(window)
+        latency = percentile([duration for duration, failed, _ in window if not failed], 50)
+
+        best_failures = min((rate for rate, _ in self._history), default=None)
+        best_latency = min((median for _, median in self._history if median is not None),
+                           default=None)
+        self._history.append((failure_rate, latency))
+        reasons = []
+        if best_failures is not None and failure_rate > best_failures + RATE_FAILURE_TOLERANCE:
+            reasons.append(f"overload failures {failure_rate:.0%} (best {best_failures:.0%})")
+        if latency is not None and best_latency is not None and \
+                latency > best_latency * RATE_LATENCY_FACTOR:
+            reasons.append(f"median {latency:.1f}s (best {best_latency:.1f}s)")
+
+        probe = False
+        if reasons:
+            self._overloaded_windows += 1
+            # Cutting has not helped for a while; see if a faster rate
+            # does any harm
+            probe = self._overloaded_windows >= RATE_PROBE_WINDOWS and \
+                failure_rate < RATE_MAX_FAILURE_RATE
+        if not reasons or probe:
+            self._overloaded_windows = 0
+
+        before = (self.concurrency, self.delay)
+        if reasons and not probe:
+            self._decrease()
+        elif failure_rate < RATE_MAX_FAILURE_RATE:
+            self._increase()
+        if (self.concurrency, self.delay) == before:
+            return None
+
+        self.adjustments += 1
+        self._stale = self._in_flight
+        direction = 'down' if reasons and not probe else 'up'
+        RATE_ADJUSTMENTS.inc(direction=direction)
+        if probe:
+            because = f"probing despite {', '.join(reasons)}"
+        else:
+            because = ', '.join(reasons) if reasons else 'eKolej keeping up'
+        if self.concurrency != before[0]:
+            change = f"concurrency {before[0]} -> {self.concurrency}"
+        else:
+            change = f"pause {before[1]:.1f}s -> {self.delay:.1f}s"
+        return f"Rate {direction} ({because}): {change}"
+
+    def _decrease(self):
+        """Multiplicative cut: fewer sessions first, then a longer pause."""
+        if self.concurrency > self.min_concurrency:
+            self.concurrency = max(self.min_concurrency,
+                                   int(self.concurrency / RATE_BACKOFF_FACTOR))
+        else:
+            self.delay = min(RATE_MAX_DELAY_SECONDS,
+                             max(RATE_DELAY_STEP_SECONDS, self.delay * RATE_BACKOFF_FACTOR))
+
+    def _increase(self):
+        """Additive step: a shorter pause first, then one more session."""
+        if self.delay > RATE_MIN_DELAY_SECONDS:
+            self.delay = max(RATE_MIN_DELAY_SECONDS, self.delay - RATE_DELAY_STEP_SECONDS)
+        elif self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+
+    def snapshot(self):
+        """Current rate settings, for progress data and the CLI summary."""
+        with self._condition:
+            return {
+                'concurrency': self.concurrency,
+                'max_concurrency': self.max_concurrency,
+                'delay_seconds': round(self.delay, 2),
+                'adjustments': self.adjustments,
+            }
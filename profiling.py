@@ -0,0 +1,247 @@
+"""
+On-demand sampling profiler for Merit Akademik automation runs
+
+A ThreadSampler looks at the stack of one running job thread every
+PROFILE_INTERVAL_SECONDS for a limited window, using sys._current_frames(),
+so nothing is slowed down until a profile is requested and the job thread
+itself is never instrumented. Each sample is put under the automation step
+the thread was in (from the job's Tracer) and classed as Python work,
+WebDriver HTTP calls or sleeps.
+
+The profile is saved as folded stacks with the step as the root frame,
+which https://www.speedscope.app and flamegraph.pl open directly.
+"""
+
+import os
+import sys
+import dis
+import time
+import threading
+from collections import Counter
+from config import PROFILE_INTERVAL_SECONDS, PROFILE_MAX_SECONDS, PROFILE_TOP_FUNCTIONS
+
+# Samples taken outside any traced step
+NO_STEP = '(outside steps)'
+
+# Modules whose frames mean the thread is talking to chromedriver
+WEBDRIVER_MODULES = ('selenium.webdriver.remote', 'urllib3', 'http.client')
+
+# Innermost (module, function) frames of a thread blocked on a socket
+SOCKET_FRAMES = {('socket', 'readinto'), ('ssl', 'read'), ('ssl', 'recv_into'),
+                 ('selectors', 'select')}
+
+# Innermost (module, function) frames of a thread waiting on a lock,
+# Condition or Event, or for another thread
+WAIT_FRAMES = {('threading', 'wait'), ('threading', '_wait_for_tstate_lock')}
+
+# C functions that sleep; they have no frame of their own, so they are
+# found as the call the innermost frame is making
+SLEEP_CALLS = {'sleep'}
+
+# {(code, instruction offset): called name}, filled as call sites are sampled
+_call_names = {}
+
+
+def frame_name(code):
+    """'module:function' label of a code object."""
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+def called_name(code, offset):
+    """
+    Name of the function a frame is calling, from its bytecode.
+
+    Works without the source, so also in the PyInstaller build.
+
+    Args:
+        code: Code object of the frame
+        offset (int): The frame's f_lasti
+
+    Returns:
+        str: The attribute or variable name the callee was loaded from,
+            or None if the frame is not in a call or the call is too
+            tangled to follow
+    """
+    key = (code, offset)
+    if key not in _call_names:
+        _call_names[key] = _find_callee(list(dis.get_instructions(code)), offset)
+    return _call_names[key]
+
+
+def _find_callee(instructions, offset):
+    index = next((i for i, ins in enumerate(instructions) if ins.offset == offset), None)
+    # Python 3.11 calls builtins like time.sleep from PRECALL already
+    if index is None or instructions[index].opname not in ('CALL', 'PRECALL'):
+        return None
+    argc = instructions[index].arg
+    index -= 1
+    while index >= 0 and instructions[index].opname in ('PRECALL', 'KW_NAMES'):
+        index -= 1
+
+    # Walk back over the arguments: the instruction before the first one
+    # that leaves exactly argc values on the stack loaded the callee
+    pushed, first_arg = 0, index + 1
+    while argc and index >= 0:
+        ins = instructions[index]
+        effect = dis.stack_effect(ins.opcode, ins.arg if ins.opcode >= dis.HAVE_ARGUMENT else None)
+        pushed += effect
+        if pushed > argc:
+            break
+        if pushed == argc and effect > 0:
+            first_arg = index
+        index -= 1
+    callee = instructions[first_arg - 1] if first_arg > 0 else None
+    if callee is None or not callee.opname.startswith('LOAD_') or \
+            not isinstance(callee.argval, str):
+        return None
+    return callee.argval
+
+
+def classify(frames, call=None):
+    """
+    Class a sampled stack as 'sleep', 'webdriver' or 'python'.
+
+    Args:
+        frames (list): (module, function) pairs, innermost last
+        call (str): Name of the function the innermost frame is calling
+    """
+    if any(module.startswith(WEBDRIVER_MODULES) for module, _ in frames):
+        return 'webdriver'
+    if frames[-1] in WAIT_FRAMES or call in SLEEP_CALLS:
+        return 'sleep'
+    if frames[-1] in SOCKET_FRAMES:
+        return 'webdriver'
+    return 'python'
+
+
+class ThreadSampler(threading.Thread):
+    """Samples another thread's stack for a time window."""
+
+    def __init__(self, thread_id, seconds, step_of=None, on_done=None,
+                 interval=PROFILE_INTERVAL_SECONDS):
+        """
+        Prepare a capture; start() begins sampling.
+
+        Args:
+            thread_id (int): threading.get_ident() of the job thread
+            seconds (float): Length of the window, capped at PROFILE_MAX_SECONDS
+            step_of (callable): Returns the step the thread is in, or None
+            on_done (callable): Called with the sampler when the window ends
+            interval (float): Seconds between samples
+        """
+        super().__init__(name=f'profiler-{thread_id}', daemon=True)
+        self.thread_id = thread_id
+        self.seconds = min(float(seconds), PROFILE_MAX_SECONDS)
+        self.step_of = step_of or (lambda: None)
+        self.on_done = on_done
+        self.interval = interval
+        self.started_at = None
+        self.elapsed = 0.0
+        self.stacks = Counter()
+        self._steps = {}
+        self._halt = threading.Event()
+
+    def stop(self):
+        """End the window early; the profile so far is kept."""
+        self._halt.set()
+
+    def run(self):
+        self.started_at = time.time()
+        started = time.perf_counter()
+        deadline = started + self.seconds
+        try:
+            while not self._halt.is_set() and time.perf_counter() < deadline:
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is None:
+                    break  # The job thread has finished
+                self._sample(frame)
+                del frame
+                self._halt.wait(self.interval)
+        finally:
+            self.elapsed = time.perf_counter() - started
+            if self.on_done:
+                self.on_done(self)
+
+    def _sample(self, frame):
+        call = called_name(frame.f_code, frame.f_lasti)
+        names, frames = [], []
+        while frame is not None:
+            names.append(frame_name(frame.f_code))
+            frames.append((frame.f_globals.get('__name__', ''), frame.f_code.co_name))
+            frame = frame.f_back
+        names.reverse()
+        frames.reverse()
+
+        step = self.step_of() or NO_STEP
+        category = classify(frames, call)
+        self.stacks[(step,) + tuple(names)] += 1
+
+        stats = self._steps.setdefault(step, {'categories': Counter(), 'functions': Counter()})
+        stats['categories'][category] += 1
+        stats['functions'][names[-1]] += 1
+
+    def summary(self, top=PROFILE_TOP_FUNCTIONS):
+        """
+        Where the sampled time went, overall and per automation step.
+
+        Returns:
+            dict: samples, seconds, categories and top functions (by
+                samples in the function itself), plus the same per step
+        """
+        def describe(categories, functions):
+            samples = sum(categories.values())
+            return {
+                'samples': samples,
+                'seconds': round(samples * self.interval, 2),
+                'categories': {name: round(count / samples * 100, 1)
+                               for name, count in categories.most_common()},
+                'top': [{'function': name, 'samples': count,
+                         'percent': round(count / samples * 100, 1)}
+                        for name, count in functions.most_common(top)],
+            }
+
+        categories, functions = Counter(), Counter()
+        for stats in self._steps.values():
+            categories.update(stats['categories'])
+            functions.update(stats['functions'])
+        if not categories:
+            return {'samples': 0, 'window_seconds': round(self.elapsed, 2), 'steps': {}}
+
+        summary = describe(categories, functions)
+        summary['window_seconds'] = round(self.elapsed, 2)
+        summary['interval'] = self.interval
+        summary['steps'] = {
+            step: describe(stats['categories'], stats['functions'])
+            for step, stats in sorted(self._steps.items(),
+                                      key=lambda item: -sum(item[1]['categories'].values()))}
+        return summary
+
+    def save(self, path):
+        """
+        Write the samples as folded stacks, one 'step;outer;...;inner count' line each.
+
+        Returns:
+            str: The path written
+        """
+        try:
+            with open(path, 'w', encoding='utf-8') as file:
+                for stack, count in self.stacks.most_common():
+                    file.write(';'.join(stack) + f" {count}\n")
+        except Exception as e:
+            raise Exception(f"Error writing profile file: {str(e)}")
+        return path
+
+
+def format_summary(summary):
+    """Format a summary as log lines: the time split, then the top function per step."""
+    if not summary.get('samples'):
+        return ['No samples taken']
+    split = ', '.join(f"{name} {percent}%" for name, percent in summary['categories'].items())
+    lines = [f"{summary['samples']} samples over {summary['window_seconds']}s: {split}"]
+    for step, stats in summary['steps'].items():
+        top = stats['top'][0] if stats['top'] else None
+        hottest = f", hottest {top['function']} {top['percent']}%" if top else ''
+        lines.append(f"  {step}: {stats['seconds']}s "
+                     f"({', '.join(f'{n} {p}%' for n, p in stats['categories'].items())}){hottest}")
+    return lines
@@ -0,0 +1,156 @@
+"""
+Thread-safe progress tracking for Merit Akademik automation jobs
+"""
+
+import time
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from config import ETA_WINDOW
+
+# Phases of a job, in the order they run
+PHASES = ('driver_start', 'login', 'navigation', 'submission')
+
+
+class ProgressStore:
+    """
+    Lock-protected progress data with throughput, ETA and phase timing.
+
+    Writers (the job thread and the automation callback) and readers (the
+    progress endpoints and event streams) only see the data through this
+    class, so every snapshot is consistent.
+    """
+
+    def __init__(self, total=0, message=''):
+        """
+        Create progress data for a job.
+
+        Args:
+            total (int): Number of records in the job
+            message (str): Initial status message
+        """
+        self._lock = threading.RLock()
+        self._data = {
+            'current': 0,
+            'total': total,
+            'message': message,
+            'completed': False,
+            'error': None
+        }
+        self._started_at = None
+        self._finished_at = None
+        self._samples = deque(maxlen=ETA_WINDOW + 1)
+        self._phases = OrderedDict()
+        self._phase = None
+        self._phase_started = None
+
+    def update(self, current, total, message=""):
+        """Update progress tracking data."""
+        with self._lock:
+            if current != self._data['current']:
+                self._samples.append((time.monotonic(), current))
+            self._data['current'] = current
+            self._data['total'] = total
+            self._data['message'] = message
+
+    def set(self, **fields):
+        """Set extra progress fields, such as results or file names."""
+        with self._lock:
+            self._data.update(fields)
+
+    def get(self, key, default=None):
+        """Read one progress field."""
+        with self._lock:
+            return self._data.get(key, default)
+
+    def restore(self, data):
+        """Load fields from a snapshot saved by another process."""
+        with self._lock:
+            for key, value in data.items():
+                if key not in ('elapsed_seconds', 'records_per_minute',
+                               'eta_seconds', 'phases', 'phase'):
+                    self._data[key] = value
+
+    def start(self):
+        """Mark the job as started."""
+        with self._lock:
+            self._started_at = time.monotonic()
+
+    def finish(self):
+        """Mark the job as finished and close the current phase."""
+        with self._lock:
+            self._end_phase()
+            self._finished_at = time.monotonic()
+            self._data['completed'] = True
+
+    def start_phase(self, name):
+        """
+        Start timing a phase, ending the previous one.
+
+        Args:
+            name (str): Phase name, usually one of PHASES
+        """
+        with self._lock:
+            self._end_phase()
+            self._phase = name
+            self._phase_started = time.monotonic()
+
+    def _end_phase(self):
+        if self._phase is not None:
+            self._phases[self._phase] = self._phases.get(self._phase, 0.0) + \
+                time.monotonic() - self._phase_started
+            self._phase = None
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of code as a phase."""
+        self.start_phase(name)
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._phase == name:
+                    self._end_phase()
+
+    def snapshot(self):
+        """
+        Get a consistent copy of the progress data.
+
+        Returns:
+            dict: Progress fields plus elapsed_seconds, records_per_minute,
+                eta_seconds, the current phase and seconds spent per phase
+        """
+        with self._lock:
+            now = time.monotonic()
+            data = dict(self._data)
+
+            end = self._finished_at or now
+            data['elapsed_seconds'] = round(
+                end - self._started_at, 1) if self._started_at else 0.0
+
+            phases = OrderedDict(self._phases)
+            if self._phase is not None:
+                phases[self._phase] = phases.get(self._phase, 0.0) + \
+                    now - self._phase_started
+            data['phases'] = {name: round(seconds, 1)
+                              for name, seconds in phases.items()}
+            data['phase'] = self._phase
+
+            # Moving average over the last ETA_WINDOW records
+            rate = None
+            if len(self._samples) >= 2:
+                (first_time, first_count), (last_time, last_count) = \
+                    self._samples[0], self._samples[-1]
+                if last_time > first_time and last_count > first_count:
+                    rate = (last_count - first_count) / (last_time - first_time)
+
+            data['records_per_minute'] = round(rate * 60, 1) if rate else None
+            remaining = max(0, data['total'] - data['current'])
+            if data['completed']:
+                data['eta_seconds'] = 0
+            elif rate:
+                data['eta_seconds'] = round(remaining / rate)
+            else:
+                data['eta_seconds'] = None
+
+            return data
@@ -0,0 +1,108 @@
+"""
+Incremental results writer for Merit Akademik automation runs
+"""
+
+import os
+import csv
+import threading
+from datetime import datetime
+from config import UPLOAD_FOLDER
+
+
+class ResultsWriter:
+    """Append per-record outcomes to CSV and XLSX files as they happen."""
+
+    COLUMNS = ['matric_number', 'status', 'error_class', 'message',
+               'duration_seconds', 'screenshot', 'timestamp']
+
+    def __init__(self, folder=UPLOAD_FOLDER, prefix='results', xlsx=True, resume_file=None):
+        """
+        Open the results files for a new run.
+
+        Args:
+            folder (str): Folder the results files are written to
+            prefix (str): Filename prefix for the results files
+            xlsx (bool): Also produce an XLSX copy when the run is closed
+            resume_file (str): Name of the CSV of an interrupted attempt of
+                the same run; its rows are kept and new ones appended
+        """
+        resume_path = os.path.join(folder, resume_file) if resume_file else None
+        if resume_path and os.path.isfile(resume_path):
+            self.csv_path = resume_path
+        else:
+            resume_path = None
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.csv_path = os.path.join(folder, f"{prefix}_{timestamp}.csv")
+        self.xlsx_path = self.csv_path[:-4] + '.xlsx' if xlsx else None
+        self._lock = threading.Lock()
+        self.row_count = 0
+        # Failed matric numbers written by this writer, oldest first
+        self.failed = []
+
+        try:
+            earlier = []
+            if resume_path:
+                with open(resume_path, 'r', encoding='utf-8', newline='') as file:
+                    earlier = list(csv.reader(file))[1:]
+            self._csv_file = open(self.csv_path, 'a' if resume_path else 'w',
+                                  encoding='utf-8', newline='')
+            self._csv_writer = csv.writer(self._csv_file)
+            if not resume_path:
+                self._csv_writer.writerow(self.COLUMNS)
+            self._csv_file.flush()
+            self.row_count = len(earlier)
+
+            # Write-only workbooks stream rows to a temporary file instead
+            # of keeping the whole sheet in memory
+            self._workbook = None
+            if self.xlsx_path:
+                import openpyxl
+
+                self._workbook = openpyxl.Workbook(write_only=True)
+                self._sheet = self._workbook.create_sheet('Results')
+                self._sheet.append(self.COLUMNS)
+                for row in earlier:
+                    self._sheet.append(row)
+        except Exception as e:
+            raise Exception(f"Error opening results file: {str(e)}")
+
+    def write(self, outcome):
+        """
+        Append one record outcome and flush it to disk.
+
+        Args:
+            outcome (dict): Outcome with keys matching COLUMNS
+        """
+        row = [outcome.get(column, '') for column in self.COLUMNS]
+        if not row[-1]:
+            row[-1] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        with self._lock:
+            if self._csv_file.closed:
+                return
+            self._csv_writer.writerow(row)
+            self._csv_file.flush()
+            if self._workbook is not None:
+                self._sheet.append(row)
+            self.row_count += 1
+            if outcome.get('status') == 'failed':
+                self.failed.append(outcome.get('matric_number'))
+
+    def close(self):
+        """Close the CSV file and save the XLSX copy."""
+        with self._lock:
+            if self._csv_file.closed:
+                return
+            self._csv_file.close()
+            if self._workbook is not None:
+                try:
+                    self._workbook.save(self.xlsx_path)
+                except Exception as e:
+                    raise Exception(
+                        f"Error writing results workbook: {str(e)}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,271 @@
+"""
+Background retention for uploaded files, results and failure evidence
+
+A daemon thread sweeps data/uploads (with its .preview cache),
+data/screenshots and data/logs every RETENTION_INTERVAL_SECONDS. Each sweep refreshes an index of file sizes and
+ages, deletes files past the folder's age limit and then the oldest files
+until the folder is under its size limit. Files named by recent jobs
+(uploads, results, failed matrics, traces, profiles, logs) and files
+younger than RETENTION_MIN_AGE_MINUTES are never deleted. The first sweep runs after
+startup, not during it.
+"""
+
+import os
+import time
+import threading
+from config import (
+    UPLOAD_FOLDER, SCREENSHOTS_FOLDER, PREVIEW_CACHE_FOLDER, LOG_FOLDER,
+    RETENTION_INTERVAL_SECONDS, RETENTION_MIN_AGE_MINUTES,
+    UPLOAD_RETENTION_MB, UPLOAD_RETENTION_DAYS,
+    SCREENSHOT_RETENTION_MB, SCREENSHOT_RETENTION_DAYS,
+    LOG_RETENTION_MB, LOG_RETENTION_DAYS
+)
+from metrics import Counter, Gauge
+from logs import get_logger
+
+log = get_logger(__name__)
+
+# Progress fields that name a file in UPLOAD_FOLDER
+JOB_FILE_FIELDS = ('results_file', 'results_xlsx', 'failed_file', 'trace_file',
+                   'profile_file')
+
+DELETED = Counter('merit_retention_deleted_total',
+                  'Files deleted by the retention manager, by folder and reason',
+                  ('folder', 'reason'))
+
+
+class FolderRule:
+    """
+    Size and age limits for one folder; None disables a limit.
+
+    Files in the named subfolders count toward the folder's limits and are
+    indexed by their path relative to it. A subfolder file named after a
+    kept file, like '.preview/<upload>.csv', is kept with it.
+    """
+
+    def __init__(self, name, path, max_mb=None, max_age_days=None, subfolders=()):
+        self.name = name
+        self.path = path
+        self.subfolders = subfolders
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.max_age = max_age_days * 86400 if max_age_days else None
+
+
+DEFAULT_RULES = (
+    FolderRule('uploads', UPLOAD_FOLDER, UPLOAD_RETENTION_MB, UPLOAD_RETENTION_DAYS,
+               subfolders=(os.path.relpath(PREVIEW_CACHE_FOLDER, UPLOAD_FOLDER),)),
+    FolderRule('screenshots', SCREENSHOTS_FOLDER,
+               SCREENSHOT_RETENTION_MB, SCREENSHOT_RETENTION_DAYS),
+    FolderRule('logs', LOG_FOLDER, LOG_RETENTION_MB, LOG_RETENTION_DAYS),
+)
+
+
+class RetentionManager:
+    """Keeps an index of managed files and enforces the folder limits."""
+
+    def __init__(self, rules=DEFAULT_RULES, interval=RETENTION_INTERVAL_SECONDS,
+                 referenced_files=None):
+        """
+        Create a manager; call start() to begin sweeping.
+
+        Args:
+            rules (tuple): FolderRule for each managed folder
+            interval (float): Seconds between sweeps
+            referenced_files (callable): Returns file names that must be
+                kept; defaults to the files of the jobs in the registry
+        """
+        self.rules = rules
+        self.interval = interval
+        self.referenced_files = referenced_files or job_files
+        self.last_sweep = None
+        # {folder name: {file name: (size, mtime)}}
+        self._index = {rule.name: {} for rule in rules}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Sweep in a daemon thread, first after one interval."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='retention',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                log.warning(f"Retention sweep failed: {str(e)}")
+
+    def track(self, path):
+        """Add a file written since the last sweep to the index."""
+        folder = os.path.dirname(path)
+        for rule in self.rules:
+            if folder == rule.path or folder in (
+                    os.path.join(rule.path, sub) for sub in rule.subfolders):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    return
+                with self._lock:
+                    self._index[rule.name][os.path.relpath(path, rule.path)] = (
+                        stat.st_size, stat.st_mtime)
+                return
+
+    def _scan(self, rule):
+        """Refresh a folder's index from disk."""
+        files = {}
+        for sub in ('',) + tuple(rule.subfolders):
+            folder = os.path.join(rule.path, sub)
+            if not os.path.isdir(folder):
+                continue
+            for entry in os.scandir(folder):
+                if entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files[os.path.join(sub, entry.name)] = (stat.st_size, stat.st_mtime)
+        with self._lock:
+            self._index[rule.name] = files
+        return dict(files)
+
+    def sweep(self):
+        """
+        Refresh the index and delete files beyond the limits.
+
+        Returns:
+            dict: Deleted file names per folder
+        """
+        now = time.time()
+        keep = set(self.referenced_files())
+        min_age = RETENTION_MIN_AGE_MINUTES * 60
+        deleted = {}
+
+        for rule in self.rules:
+            files = self._scan(rule)
+            # Oldest first, leaving out files that must be kept
+            candidates = sorted(
+                (mtime, name, size) for name, (size, mtime) in files.items()
+                if not _kept(name, keep) and now - mtime >= min_age)
+            total = sum(size for size, _ in files.values())
+            removed = []
+            gone = set()
+
+            for mtime, name, size in candidates:
+                if rule.max_age and now - mtime > rule.max_age:
+                    reason = 'age'
+                elif rule.max_bytes and total > rule.max_bytes:
+                    reason = 'size'
+                else:
+                    continue
+                if name in gone:
+                    # Went with its upload earlier in this sweep
+                    continue
+                deleted_names = self._delete(rule, name)
+                if deleted_names:
+                    gone.update(deleted_names)
+                    total -= sum(files.get(deleted, (0, 0))[0] for deleted in deleted_names)
+                    removed.append(name)
+                    DELETED.inc(folder=rule.name, reason=reason)
+
+            if removed:
+                deleted[rule.name] = removed
+                log.info(f"Retention removed {len(removed)} files from {rule.name}, "
+                         f"{total / 1024 / 1024:.1f} MB left")
+
+        self.last_sweep = now
+        return deleted
+
+    def _delete(self, rule, name):
+        """
+        Delete an indexed file, and the preview cache of a deleted upload.
+
+        Returns:
+            list: Index names of the deleted files; empty if the file could
+                not be deleted
+        """
+        try:
+            os.remove(os.path.join(rule.path, name))
+        except OSError:
+            return []
+        names = [name]
+        if rule.path == UPLOAD_FOLDER and os.path.dirname(name) == '':
+            # The preview cache of a deleted upload is useless
+            preview = os.path.relpath(
+                os.path.join(PREVIEW_CACHE_FOLDER, name + '.csv'), UPLOAD_FOLDER)
+            try:
+                os.remove(os.path.join(rule.path, preview))
+            except OSError:
+                pass
+            else:
+                names.append(preview)
+        with self._lock:
+            for removed in names:
+                self._index[rule.name].pop(removed, None)
+        return names
+
+    def usage(self):
+        """
+        Disk use of each managed folder, from the index.
+
+        Returns:
+            dict: For each folder, files, bytes and the oldest file's age in
+                seconds; empty until the first sweep
+        """
+        now = time.time()
+        with self._lock:
+            index = {name: list(files.values()) for name, files in self._index.items()}
+        return {name: {'files': len(files),
+                       'bytes': sum(size for size, _ in files),
+                       'oldest_seconds': round(now - min(mtime for _, mtime in files))
+                       if files else 0}
+                for name, files in index.items()}
+
+
+def _kept(name, keep):
+    """True if a file, or the file a subfolder cache entry is named after, is kept."""
+    if name in keep:
+        return True
+    return os.path.dirname(name) != '' and \
+        os.path.splitext(os.path.basename(name))[0] in keep
+
+
+def job_files():
+    """File names referenced by the jobs the registry still knows."""
+    from jobs import get_registry
+
+    names = set()
+    for job in get_registry().list():
+        data = job.to_dict()
+        names.add(f"{job.id}.jsonl")
+        names.update(data.get('filenames') or [])
+        progress = data.get('progress') or {}
+        for field in JOB_FILE_FIELDS:
+            if progress.get(field):
+                names.add(os.path.basename(progress[field]))
+    return names
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """Get the process-wide retention manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = RetentionManager()
+        return _manager
+
+
+def _usage_values(key):
+    return {(name,): stats[key] for name, stats in get_manager().usage().items()}
+
+
+Gauge('merit_disk_bytes', 'Bytes in each managed data folder, as of the last sweep',
+      ('folder',), function=lambda: _usage_values('bytes'))
+Gauge('merit_disk_files', 'Files in each managed data folder, as of the last sweep',
+      ('folder',), function=lambda: _usage_values('files'))
@@ -1,8 +1,106 @@
 """
 Entry point script for Merit Akademik Automation
+
+Serves the app with waitress, a multithreaded production WSGI server.
+Pass --dev to use Flask's development server instead, or --profile-startup
+to report how long startup takes and exit.
 """
-from app import app
-from config import DEBUG
+import sys
+import argparse
+import startup
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+    from config import SERVER_HOST, SERVER_PORT, SERVER_THREADS
+
+    parser = argparse.ArgumentParser(description='Merit Akademik web server')
+    parser.add_argument('--dev', action='store_true',
+                        help="use Flask's development server")
+    parser.add_argument('--host', default=SERVER_HOST,
+                        help=f'address to listen on (default {SERVER_HOST})')
+    parser.add_argument('--port', type=int, default=SERVER_PORT,
+                        help=f'port to listen on (default {SERVER_PORT})')
+    parser.add_argument('--threads', type=int, default=SERVER_THREADS,
+                        help=f'request threads (default {SERVER_THREADS})')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='report import and initialization times, then exit')
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help='also write the startup report as JSON')
+    # PyInstaller passes no arguments, but ignore any the shell adds
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def serve(app, host, port, threads):
+    """
+    Serve the app with waitress.
+
+    Args:
+        app (Flask): Application to serve
+        host (str): Address to listen on
+        port (int): Port to listen on
+        threads (int): Request threads
+    """
+    from waitress import serve as waitress_serve
+    from config import SERVER_CONNECTION_LIMIT, SERVER_CHANNEL_TIMEOUT
+
+    print(f"[INFO] Serving on http://{host}:{port} with {threads} threads "
+          f"(started in {startup.time.perf_counter() - startup.STARTED:.2f}s)")
+    waitress_serve(
+        app,
+        host=host,
+        port=port,
+        threads=threads,
+        connection_limit=SERVER_CONNECTION_LIMIT,
+        channel_timeout=SERVER_CHANNEL_TIMEOUT,
+        ident='MeritAkademik'
+    )
+
+
+def profile_startup(app, output=None):
+    """
+    Serve one page in-process and report where startup time went.
+
+    Args:
+        app (Flask): Application that was just imported
+        output (str): Optional path for a JSON copy of the report
+    """
+    with app.test_client() as client:
+        started = startup.time.perf_counter()
+        client.get('/')
+        first_page = startup.time.perf_counter() - started
+
+    startup.profiler.stop()
+    report = startup.profiler.report(first_page)
+    startup.print_report(report)
+    if output:
+        startup.save_report(report, output)
+        print(f"[INFO] Report saved to {output}")
+
+
+def main(argv=None):
+    """Start the web server."""
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Start timing before the app and its dependencies are imported
+    if '--profile-startup' in argv:
+        startup.profiler.start()
+
+    args = parse_args(argv)
+    with startup.step('import app'):
+        from app import app
+        from config import DEBUG
+
+    if args.profile_startup:
+        profile_startup(app, args.profile_output)
+    elif args.dev:
+        app.run(debug=DEBUG, host=args.host, port=args.port, threaded=True)
+    else:
+        serve(app, args.host, args.port, args.threads)
+    return True
+
 
 if __name__ == '__main__':
-    app.run(debug=DEBUG, host='0.0.0.0', port=5000)
+    success = main()
+    sys.exit(0 if success else 1)
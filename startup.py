@@ -0,0 +1,149 @@
+"""
+Startup profiling for the Merit Akademik web application
+
+Times every module imported while the app starts and every initialization
+step wrapped in step(), then reports the time to the first served page.
+Enabled with `python run.py --profile-startup`; when profiling is off,
+step() only costs a function call.
+"""
+
+import sys
+import json
+import time
+import builtins
+import threading
+import importlib.util
+from contextlib import contextmanager
+
+# Interpreter start is not available portably, so run.py imports this
+# module first and startup is measured from here
+STARTED = time.perf_counter()
+
+
+class StartupProfiler:
+    """Record import and initialization times during startup."""
+
+    def __init__(self):
+        self.imports = {}
+        self.steps = []
+        self._original_import = None
+        self._local = threading.local()
+
+    @property
+    def active(self):
+        return self._original_import is not None
+
+    def start(self):
+        """Start timing imports."""
+        if not self.active:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def stop(self):
+        """Stop timing imports."""
+        if self.active:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if level == 0 and name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        try:
+            package = (globals or {}).get('__package__') if level else None
+            fullname = importlib.util.resolve_name(
+                '.' * level + name, package) if level else name
+        except (ImportError, ValueError):
+            return original(name, globals, locals, fromlist, level)
+        if fullname in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        # Time spent in nested imports is taken out of the parent's own time
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if fullname in sys.modules and fullname not in self.imports:
+                self.imports[fullname] = {'cumulative': elapsed,
+                                          'self': elapsed - nested,
+                                          'top_level': not stack}
+
+    @contextmanager
+    def step(self, name):
+        """Time an initialization step."""
+        if not self.active:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - started))
+
+    def report(self, first_page_seconds=None, limit=15):
+        """
+        Summarize the recorded times.
+
+        Args:
+            first_page_seconds (float): Time taken to serve the first page
+            limit (int): Number of slowest modules to include
+
+        Returns:
+            dict: Totals, slowest modules and initialization steps, in seconds
+        """
+        top_level = sum(record['cumulative'] for record in self.imports.values()
+                        if record['top_level'])
+        slowest = sorted(self.imports.items(),
+                         key=lambda item: item[1]['self'], reverse=True)[:limit]
+        ready = time.perf_counter() - STARTED
+        return {
+            'import_seconds': round(top_level, 4),
+            'modules_imported': len(self.imports),
+            'steps': [{'name': name, 'seconds': round(seconds, 4)}
+                      for name, seconds in self.steps],
+            'slowest_modules': [{'module': module,
+                                 'self_seconds': round(record['self'], 4),
+                                 'cumulative_seconds': round(record['cumulative'], 4)}
+                                for module, record in slowest],
+            'ready_seconds': round(ready, 4),
+            'first_page_seconds': round(first_page_seconds, 4)
+            if first_page_seconds is not None else None,
+            'time_to_first_page_seconds': round(ready + (first_page_seconds or 0), 4),
+        }
+
+
+def print_report(report):
+    """Print a startup report as a table."""
+    print(f"\n{'module':<48} {'self':>9} {'cumulative':>11}")
+    for entry in report['slowest_modules']:
+        print(f"{entry['module']:<48} {entry['self_seconds'] * 1000:>7.1f}ms "
+              f"{entry['cumulative_seconds'] * 1000:>9.1f}ms")
+
+    print(f"\n{'initialization step':<48} {'time':>9}")
+    for entry in report['steps']:
+        print(f"{entry['name']:<48} {entry['seconds'] * 1000:>7.1f}ms")
+
+    print(f"\n[INFO] Imports: {report['import_seconds']:.3f}s "
+          f"({report['modules_imported']} modules)")
+    print(f"[INFO] Ready to serve: {report['ready_seconds']:.3f}s")
+    if report['first_page_seconds'] is not None:
+        print(f"[INFO] First page: {report['first_page_seconds']:.3f}s")
+    print(f"[INFO] Time to first page: {report['time_to_first_page_seconds']:.3f}s")
+
+
+def save_report(report, path):
+    """Write a startup report as JSON."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+
+
+# Shared by run.py and the modules that mark their initialization steps
+profiler = StartupProfiler()
+step = profiler.step
@@ -0,0 +1,272 @@
+// Auto-submit form when file is selected
+document.getElementById('file').addEventListener('change', function(e) {
+    const files = Array.from(e.target.files);
+    const label = document.getElementById('fileLabel');
+
+    if (files.length) {
+        label.textContent = files.map(f => f.name).join(', ');
+        label.classList.add('has-file');
+
+        // Auto-submit form to get columns
+        setTimeout(() => {
+            document.getElementById('mainForm').submit();
+        }, 500);
+    }
+});
+
+// Show sample values from the chosen matric column
+document.getElementById('matric_column')?.addEventListener('change', function(e) {
+    const preview = document.getElementById('columnPreview');
+    if (!e.target.value) {
+        preview.textContent = '';
+        return;
+    }
+    const params = new URLSearchParams({column: e.target.value, limit: 10});
+    fetch('/preview/' + encodeURIComponent(preview.dataset.filename) + '?' + params)
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                preview.textContent = data.error;
+            } else {
+                const samples = data.samples.length ? data.samples.join(', ') : 'no values';
+                preview.textContent = `${data.total_rows} rows. Sample: ${samples}`;
+            }
+        })
+        .catch(error => {
+            console.error('Error fetching preview:', error);
+        });
+});
+
+// Handle configuration form submission
+document.getElementById('configForm')?.addEventListener('submit', function(e) {
+    document.getElementById('loadingDiv').classList.add('show');
+    document.getElementById('runBtn').disabled = true;
+    document.getElementById('runBtn').textContent = 'Processing...';
+
+    // Start progress tracking
+    startProgressTracking();
+});
+
+// Progress tracking functionality
+let progressSource;
+let progressInterval;
+let currentJobId;
+let logSource;
+
+// Lines kept in the live log panel
+const JOB_LOG_LINES = 500;
+
+function appendLogLine(entry) {
+    const log = document.getElementById('jobLog');
+    const time = (entry.ts || '').slice(11, 19);
+    const matric = entry.matric ? entry.matric + ' ' : '';
+    log.textContent += `${time} ${entry.level} ${matric}${entry.message}\n`;
+
+    const lines = log.textContent.split('\n');
+    if (lines.length > JOB_LOG_LINES + 1) {
+        log.textContent = lines.slice(-JOB_LOG_LINES - 1).join('\n');
+    }
+    log.scrollTop = log.scrollHeight;
+}
+
+function startLogTail(jobId) {
+    if (logSource) logSource.close();
+    if (!jobId || !window.EventSource) return;
+
+    document.getElementById('jobLog').textContent = '';
+    document.getElementById('jobLogPanel').style.display = 'block';
+    // The stream resumes by byte offset after a reconnect and ends with the job
+    logSource = new EventSource('/jobs/' + encodeURIComponent(jobId) + '/log/stream');
+    logSource.addEventListener('log', function(e) {
+        appendLogLine(JSON.parse(e.data));
+    });
+    logSource.addEventListener('end', function() {
+        logSource.close();
+        logSource = null;
+    });
+}
+
+function controlJob(action) {
+    if (!currentJobId) return;
+    if (action === 'cancel' && !confirm('Cancel this run? Unprocessed matric numbers will be saved to the failed file.')) return;
+    fetch('/jobs/' + encodeURIComponent(currentJobId) + '/' + action, {method: 'POST'})
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) alert(data.error);
+        })
+        .catch(error => {
+            console.error('Error controlling job:', error);
+        });
+}
+
+function updateJobControls(data) {
+    const running = data.status === 'running' || data.status === 'paused';
+    document.getElementById('jobControls').style.display = running ? 'block' : 'none';
+    document.getElementById('pauseBtn').style.display = data.status === 'running' ? 'inline-block' : 'none';
+    document.getElementById('resumeBtn').style.display = data.status === 'paused' ? 'inline-block' : 'none';
+}
+
+function stopProgressTracking() {
+    if (progressSource) {
+        progressSource.close();
+        progressSource = null;
+    }
+    clearInterval(progressInterval);
+}
+
+function resetRunButton() {
+    const runBtn = document.getElementById('runBtn');
+    if (runBtn) {
+        runBtn.disabled = false;
+        runBtn.textContent = 'Process Matric Numbers';
+    }
+    document.getElementById('loadingDiv').classList.remove('show');
+}
+
+function formatDuration(seconds) {
+    seconds = Math.round(seconds);
+    const minutes = Math.floor(seconds / 60);
+    const hours = Math.floor(minutes / 60);
+    if (hours) return `${hours}h ${minutes % 60}m`;
+    if (minutes) return `${minutes}m ${seconds % 60}s`;
+    return `${seconds}s`;
+}
+
+function formatProgressStats(data) {
+    const stats = [];
+    if (data.elapsed_seconds) stats.push(`Elapsed ${formatDuration(data.elapsed_seconds)}`);
+    if (data.records_per_minute) stats.push(`${data.records_per_minute} records/min`);
+    if (data.eta_seconds && !data.completed) stats.push(`ETA ${formatDuration(data.eta_seconds)}`);
+    if (data.phases) {
+        const phases = Object.entries(data.phases)
+            .map(([name, seconds]) => `${name.replace('_', ' ')} ${formatDuration(seconds)}`);
+        if (phases.length) stats.push(phases.join(', '));
+    }
+    return stats.join(' · ');
+}
+
+function handleProgress(data) {
+    const progressBar = document.getElementById('progressBar');
+    const progressText = document.getElementById('progressText');
+    const progressMessage = document.getElementById('progressMessage');
+    const progressSpinner = document.getElementById('progressSpinner');
+    const resultsSection = document.getElementById('resultsSection');
+    const resultsSummary = document.getElementById('resultsSummary');
+    const resultsDetails = document.getElementById('resultsDetails');
+    const resultsLink = document.getElementById('resultsLink');
+
+    // Update progress bar
+    const percentage = data.total > 0 ? (data.current / data.total) * 100 : 0;
+    progressBar.style.width = percentage + '%';
+
+    // Update progress text
+    progressText.textContent = `${data.current} / ${data.total} matric numbers processed`;
+
+    // Update progress message
+    progressMessage.textContent = data.message || 'Processing...';
+    document.getElementById('progressStats').textContent = formatProgressStats(data);
+    updateJobControls(data);
+
+    // Results are written as they happen, so link them straight away
+    if (data.results_file) {
+        resultsLink.href = '/results/' + encodeURIComponent(data.results_file);
+        resultsLink.style.display = 'inline-block';
+    }
+
+    // Handle completion or error
+    if (data.error) {
+        stopProgressTracking();
+        progressSpinner.style.display = 'none';
+
+        // Show error
+        resultsSection.style.display = 'block';
+        resultsSummary.innerHTML = '<span style="color: #dc3545;">❌ Error</span>';
+        resultsDetails.innerHTML = `<div style="color: #dc3545;">Error: ${data.error}</div>`;
+
+        resetRunButton();
+
+    } else if (data.completed) {
+        stopProgressTracking();
+        progressSpinner.style.display = 'none';
+
+        // Show results
+        resultsSection.style.display = 'block';
+
+        if (data.results) {
+            const success = data.results.success_count || 0;
+            const errors = data.results.error_count || 0;
+
+            resultsSummary.innerHTML = data.status === 'cancelled'
+                ? '<span style="color: #856404;">⏹ Processing Cancelled</span>'
+                : '<span style="color: #28a745;">✅ Processing Complete</span>';
+
+            let details = `<div>📊 Results: ${success} successful, ${errors} errors</div>`;
+            if (data.failed_file) {
+                details += `<div>📄 Failed matrics saved to: ${data.failed_file}</div>`;
+            }
+            if (data.profile_file) {
+                details += `<div>⏱ <a href="/results/${encodeURIComponent(data.profile_file)}">Download profile (folded stacks)</a></div>`;
+            }
+            if (data.results_xlsx) {
+                details += `<div>📥 <a href="/results/${encodeURIComponent(data.results_xlsx)}">Download results (.xlsx)</a></div>`;
+            }
+            resultsDetails.innerHTML = details;
+        } else {
+            resultsSummary.innerHTML = '<span style="color: #28a745;">✅ Processing Complete</span>';
+            resultsDetails.innerHTML = '<div>Process completed successfully.</div>';
+        }
+
+        resetRunButton();
+    }
+}
+
+function startProgressPolling(jobId) {
+    stopProgressTracking();
+    const query = jobId ? '?job_id=' + encodeURIComponent(jobId) : '';
+    progressInterval = setInterval(function() {
+        fetch('/progress' + query)
+            .then(response => response.json())
+            .then(handleProgress)
+            .catch(error => {
+                console.error('Error fetching progress:', error);
+            });
+    }, 1000); // Poll every second
+}
+
+function startProgressTracking(jobId) {
+    currentJobId = jobId;
+    startLogTail(jobId);
+    // Show progress section
+    document.getElementById('progressSection').style.display = 'block';
+    document.getElementById('resultsSection').style.display = 'none';
+
+    if (!window.EventSource) {
+        startProgressPolling(jobId);
+        return;
+    }
+
+    // Progress is pushed as it happens; the browser reconnects with
+    // Last-Event-ID by itself if the stream drops
+    let received = false;
+    progressSource = new EventSource(
+        jobId ? '/jobs/' + encodeURIComponent(jobId) + '/stream' : '/progress/stream');
+    progressSource.addEventListener('progress', function(e) {
+        received = true;
+        handleProgress(JSON.parse(e.data));
+    });
+    progressSource.onerror = function() {
+        // Fall back to polling if streaming never worked
+        if (!received) {
+            console.error('Progress stream unavailable, polling instead');
+            startProgressPolling(jobId);
+        }
+    };
+}
+
+// Resume progress tracking for a job the page was rendered for
+window.addEventListener('load', function() {
+    const jobId = document.body.dataset.jobId;
+    if (jobId) {
+        startProgressTracking(jobId);
+    }
+});
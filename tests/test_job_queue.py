@@ -0,0 +1,143 @@
+"""
+Tests for resuming SQLite queue jobs after their worker dies
+
+The browser is replaced by a fake, so the tests run without Chrome.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import sqlite3
+import multiprocessing
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import automation  # noqa: E402
+from config import UPLOAD_FOLDER, JOB_MAX_ATTEMPTS  # noqa: E402
+from jobs import run_job, JOB_DONE, JOB_FAILED, JOB_PAUSED  # noqa: E402
+from job_queue import SQLiteJobQueue, QueuedJob, StoredJob  # noqa: E402
+
+MATRICS = ['M0', 'M1', 'M2', 'M3', 'M4']
+
+
+class FakeDriver:
+    def execute_script(self, *args):
+        return True
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def fake_browser(tmp_path, monkeypatch):
+    """Stand in for Chrome; every submission is appended to a file."""
+    submissions = tmp_path / 'submissions.txt'
+    queue = SQLiteJobQueue(str(tmp_path / 'jobs.sqlite3'))
+    job_id = queue.enqueue({'matric_list': MATRICS, 'username': 'u', 'password': 'p',
+                            'sesi': '2024/2025', 'semester': '1', 'achievement': '1'})
+
+    def process_single_matric(self, matric, sesi, semester, achievement):
+        with open(submissions, 'a', encoding='utf-8') as file:
+            file.write(matric + '\n')
+        if matric == 'M1':
+            # The user pauses while M1 is being submitted
+            queue.set_control(job_id, 'pause')
+            raise Exception(f"Failed to process matric {matric}: unknown matric")
+        return True
+
+    monkeypatch.setattr(automation.MeritAkademikAutomation, 'setup_driver',
+                        lambda self: setattr(self, 'driver', FakeDriver()))
+    monkeypatch.setattr(automation.MeritAkademikAutomation, 'login',
+                        lambda self, username, password: True)
+    monkeypatch.setattr(automation.MeritAkademikAutomation, 'navigate_to_merit_akademik',
+                        lambda self: True)
+    monkeypatch.setattr(automation.MeritAkademikAutomation, 'process_single_matric',
+                        process_single_matric)
+    return queue, job_id, submissions
+
+
+def run_claimed(queue, worker_id):
+    run_job(QueuedJob(queue, queue.claim(worker_id)))
+
+
+def wait_for_status(queue, job_id, status, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if queue.get(job_id)['status'] == status:
+            return
+        time.sleep(0.1)
+    raise AssertionError(f"Job never reached {status}")
+
+
+def expire_lease(queue, job_id):
+    with sqlite3.connect(queue.path) as conn:
+        conn.execute("UPDATE jobs SET lease_until = 0 WHERE id = ?", (job_id,))
+
+
+def test_paused_job_resumes_after_worker_is_killed(fake_browser):
+    queue, job_id, submissions = fake_browser
+
+    worker = multiprocessing.get_context('fork').Process(
+        target=run_claimed, args=(queue, 'worker-1'))
+    worker.start()
+    try:
+        wait_for_status(queue, job_id, JOB_PAUSED)
+    finally:
+        worker.kill()
+        worker.join()
+
+    # The stored progress covers both finished records while paused
+    progress = QueuedJob(queue, queue.get(job_id)).progress
+    assert progress.get('processed') == 2
+    assert progress.get('failed_so_far') == ['M1']
+
+    queue.set_control(job_id, 'resume')
+    expire_lease(queue, job_id)
+    job = QueuedJob(queue, queue.claim('worker-2'))
+    assert job.spec['resume_from'] == 2
+    run_job(job)
+
+    assert job.status == JOB_DONE
+    assert submissions.read_text().split() == MATRICS
+    results = job.progress.get('results')
+    assert results['success_count'] == 4
+    assert results['failed_matrics'] == ['M1']
+
+    with open(os.path.join(UPLOAD_FOLDER, job.progress.get('results_file')),
+              encoding='utf-8', newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row['matric_number'] for row in rows] == MATRICS
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / 'jobs.sqlite3'))
+    job_id = queue.enqueue({'matric_list': MATRICS, 'username': 'u', 'password': 'p'})
+
+    # Every worker that claims the job dies before finishing it
+    for attempt in range(JOB_MAX_ATTEMPTS):
+        assert queue.claim(f'worker-{attempt}')['id'] == job_id
+        expire_lease(queue, job_id)
+
+    assert queue.claim('worker-last') is None
+    row = queue.get(job_id)
+    assert row['status'] == JOB_FAILED
+    assert row['attempts'] == JOB_MAX_ATTEMPTS
+    assert 'password' not in json.loads(row['spec'])
+    assert json.loads(row['progress'])['error']
+
+
+def test_profile_request_keeps_earlier_pause(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / 'jobs.sqlite3'))
+    job_id = queue.enqueue({'matric_list': MATRICS, 'username': 'u', 'password': 'p'})
+    job = QueuedJob(queue, queue.claim('worker-1'))
+
+    # Both arrive before the worker looks at the queue again
+    StoredJob(queue, queue.get(job_id)).pause()
+    StoredJob(queue, queue.get(job_id)).profile(5)
+    job.control.sync()
+
+    assert job.status == JOB_PAUSED
+    assert job.control.pending_profile == 5
@@ -0,0 +1,61 @@
+"""
+Tests for the adaptive pacing of record submissions
+
+Records are fed straight to a RateController with made-up latencies, so
+the tests never wait for eKolej or for the pauses they cause.
+"""
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pacing  # noqa: E402
+from pacing import RateController  # noqa: E402
+from config import RATE_WINDOW, RATE_MIN_DELAY_SECONDS  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_pauses(monkeypatch):
+    monkeypatch.setattr(pacing.time, 'sleep', lambda seconds: None)
+
+
+def run_windows(rate, windows, latency, failures=None):
+    """Submit windows of records; failures(i) gives (failed, overload) per record."""
+    for i in range(windows * RATE_WINDOW):
+        rate.acquire()
+        failed, overload = failures(i) if failures else (False, False)
+        rate.release(latency, failed, overload)
+
+
+def test_lasting_slowdown_becomes_the_new_normal():
+    rate = RateController()
+    run_windows(rate, 5, latency=5.0)
+    assert rate.delay == RATE_MIN_DELAY_SECONDS
+
+    # eKolej settles at 8 s a record whatever the pace
+    run_windows(rate, 3, latency=8.0)
+    assert rate.delay > RATE_MIN_DELAY_SECONDS
+
+    run_windows(rate, 30, latency=8.0)
+    assert rate.delay == RATE_MIN_DELAY_SECONDS
+
+
+def test_invalid_matrics_do_not_slow_the_run():
+    rate = RateController()
+    data = random.Random(15)
+
+    # About 15% of the matric numbers are unknown to eKolej
+    run_windows(rate, 30, latency=5.0,
+                failures=lambda i: (data.random() < 0.15, False))
+    assert rate.delay == RATE_MIN_DELAY_SECONDS
+    assert rate.adjustments == 0
+
+
+def test_timeouts_cut_the_rate():
+    rate = RateController()
+    run_windows(rate, 3, latency=5.0)
+    run_windows(rate, 1, latency=5.0, failures=lambda i: (i % 2 == 0, i % 2 == 0))
+    assert rate.delay > RATE_MIN_DELAY_SECONDS
@@ -0,0 +1,53 @@
+"""
+Tests for classing profile samples from frames alone
+
+Source lines are not shipped in the PyInstaller build, so these never
+rely on linecache.
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import ThreadSampler, classify  # noqa: E402
+
+
+class Pacing:
+    delay = 0.5
+
+
+def profile(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    time.sleep(0.1)
+    sampler = ThreadSampler(thread.ident, 0.2, interval=0.01)
+    sampler.start()
+    sampler.join()
+    thread.join()
+    return sampler.summary()['categories']
+
+
+def test_sleep_and_waits_are_sleep():
+    assert profile(lambda: time.sleep(Pacing.delay)) == {'sleep': 100.0}
+    assert profile(lambda: threading.Event().wait(0.5)) == {'sleep': 100.0}
+
+
+def test_busy_loop_is_python():
+    def spin():
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            sum(range(1000))
+
+    assert profile(spin) == {'python': 100.0}
+
+
+def test_chromedriver_calls_are_webdriver():
+    frames = [('automation', 'process_single_matric'),
+              ('selenium.webdriver.remote.webdriver', 'execute'),
+              ('urllib3.connectionpool', 'urlopen'),
+              ('http.client', 'getresponse'),
+              ('socket', 'readinto')]
+    assert classify(frames) == 'webdriver'
+    assert classify([('automation', 'keepalive'), ('socket', 'readinto')]) == 'webdriver'
@@ -0,0 +1,174 @@
+"""
+Per-step timing spans for Merit Akademik automation runs
+
+A Tracer records how long each automation step takes (driver start, login
+steps, navigation, Tambah, each select, save, screenshots), tagged with the
+job and matric number. Spans are saved in the Chrome trace event format, so
+a trace file opens in chrome://tracing or https://ui.perfetto.dev, and are
+summarized as per-step latency percentiles. Every span also feeds the
+merit_step_seconds histogram on /metrics, traced or not.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from config import TRACE_MAX_EVENTS
+from metrics import STEP_SECONDS
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers, or None if it is empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class Tracer:
+    """Thread-safe collection of timed spans for one run."""
+
+    def __init__(self, job_id=None, max_events=TRACE_MAX_EVENTS):
+        """
+        Start an empty trace.
+
+        Args:
+            job_id (str): Job the spans belong to
+            max_events (int): Spans kept for the trace file; durations for
+                the summary are always kept
+        """
+        self.job_id = job_id
+        self.max_events = max_events
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._events = []
+        self._durations = {}
+        # Innermost open span of each thread, for the sampling profiler
+        self._active = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **tags):
+        """
+        Time a block of code as one step.
+
+        Args:
+            name (str): Step name, such as 'login.submit' or 'select.matric'
+            **tags: Extra values stored with the span, such as matric
+        """
+        thread_id = threading.get_ident()
+        outer = self._active.get(thread_id)
+        self._active[thread_id] = name
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(name, started, time.perf_counter(), error=error, **tags)
+            self._active[thread_id] = outer
+
+    def current_step(self, thread_id):
+        """Name of the span a thread is in, or None."""
+        return self._active.get(thread_id)
+
+    def record(self, name, started, finished, **tags):
+        """Store a span measured elsewhere, with perf_counter timestamps."""
+        duration = finished - started
+        STEP_SECONDS.observe(duration, step=name)
+        args = {key: value for key, value in tags.items() if value is not None}
+        if self.job_id:
+            args['job'] = self.job_id
+
+        with self._lock:
+            self._durations.setdefault(name, []).append(duration)
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append({
+                'name': name,
+                'cat': name.split('.')[0],
+                'ph': 'X',
+                'ts': round((started - self._origin) * 1e6),
+                'dur': round(duration * 1e6),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args,
+            })
+
+    def summary(self):
+        """
+        Per-step latency percentiles.
+
+        Returns:
+            dict: For each step, count, p50/p95/max and total in seconds
+        """
+        with self._lock:
+            durations = {name: list(values) for name, values in self._durations.items()}
+
+        return {name: {'count': len(values),
+                       'p50': round(percentile(values, 50), 3),
+                       'p95': round(percentile(values, 95), 3),
+                       'max': round(max(values), 3),
+                       'total': round(sum(values), 3)}
+                for name, values in durations.items()}
+
+    def save(self, path):
+        """
+        Write the spans as a Chrome trace file.
+
+        Args:
+            path (str): Destination .json file
+
+        Returns:
+            str: The path written
+        """
+        with self._lock:
+            events = list(self._events)
+            dropped = self.dropped
+
+        label = f"Merit Akademik job {self.job_id}" if self.job_id else "Merit Akademik"
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                     'args': {'name': label}}]
+        try:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump({'traceEvents': metadata + events,
+                           'displayTimeUnit': 'ms',
+                           'otherData': {'job': self.job_id,
+                                         'dropped_spans': dropped}}, file)
+        except Exception as e:
+            raise Exception(f"Error writing trace file: {str(e)}")
+        return path
+
+
+class NullTracer:
+    """Tracer stand-in used when a run is not traced; only feeds /metrics."""
+
+    job_id = None
+
+    @contextmanager
+    def span(self, name, **tags):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter())
+
+    def record(self, name, started, finished, **tags):
+        STEP_SECONDS.observe(finished - started, step=name)
+
+    def summary(self):
+        return {}
+
+
+def format_summary(summary):
+    """Format a summary as one line per step, slowest total first."""
+    lines = []
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]['total']):
+        lines.append(f"{name}: n={stats['count']} p50={stats['p50']:.2f}s "
+                     f"p95={stats['p95']:.2f}s max={stats['max']:.2f}s")
+    return lines
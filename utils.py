@@ -4,9 +4,25 @@ Utility functions for Merit Akademik Automation System
 
 import os
 import csv
-import openpyxl
+import uuid
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
 from werkzeug.utils import secure_filename
-from config import ALLOWED_EXTENSIONS, UPLOAD_FOLDER
+from config import (
+    ALLOWED_EXTENSIONS, UPLOAD_FOLDER,
+    MAX_UPLOAD_SIZE_MB, UPLOAD_CHUNK_SIZE, PREVIEW_CACHE_FOLDER,
+    ROW_INDEX_STRIDE, ROW_INDEX_CACHE_SIZE
+)
+from metrics import UPLOAD_PARSE_SECONDS
+from retention import get_manager as get_retention_manager
+
+# Hex digits of the SHA-256 kept in stored upload names
+CONTENT_HASH_LENGTH = 16
+
+# Delimiters the CSV reader will detect
+CSV_DELIMITERS = ',;\t|'
 
 
 class LightweightFileReader:
@@ -23,6 +39,10 @@ class LightweightFileReader:
         Returns:
             tuple: (column_names, rows_data)
         """
+        # openpyxl takes longer to import than the rest of the app, so it
+        # is only loaded once an Excel file is actually read
+        import openpyxl
+
         try:
             workbook = openpyxl.load_workbook(filepath, read_only=True)
             sheet = workbook.active
@@ -66,8 +86,7 @@ class LightweightFileReader:
                 # Try to detect delimiter
                 sample = file.read(1024)
                 file.seek(0)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
+                delimiter = _detect_delimiter(sample)
 
                 reader = csv.reader(file, delimiter=delimiter)
                 rows = list(reader)
@@ -114,6 +133,25 @@ class LightweightFileReader:
             raise Exception(f"Error writing CSV file: {str(e)}")
 
 
+def _detect_delimiter(sample):
+    """
+    Detect the delimiter of a CSV sample.
+
+    Only common delimiters are considered, so headers such as 'matric_no'
+    are not mistaken for '_'-separated data.
+
+    Args:
+        sample (str): Start of the CSV file
+
+    Returns:
+        str: Detected delimiter, ',' when it cannot be determined
+    """
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+
 def allowed_file(filename):
     """
     Check if the uploaded file has an allowed extension.
@@ -131,6 +169,10 @@ def process_uploaded_file(file):
     """
     Process uploaded file and save it to the uploads folder.
 
+    The upload is streamed to disk in chunks while its SHA-256 is computed,
+    then stored under a content-addressed name. Uploading the same content
+    again reuses the stored file instead of writing a second copy.
+
     Args:
         file: Flask file object from request.files
 
@@ -144,16 +186,80 @@ def process_uploaded_file(file):
         raise Exception(
             "Invalid file type. Please upload .xlsx or .csv files only.")
 
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(UPLOAD_FOLDER, filename)
+    original_name = secure_filename(file.filename)
+    temp_path = os.path.join(
+        UPLOAD_FOLDER, f".upload-{uuid.uuid4().hex}.part")
 
     try:
-        file.save(filepath)
+        digest = hashlib.sha256()
+        size = 0
+        with open(temp_path, 'wb') as output:
+            while True:
+                chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if MAX_UPLOAD_SIZE_MB and size > MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+                    raise Exception(
+                        f"File is larger than the {MAX_UPLOAD_SIZE_MB} MB upload limit")
+                digest.update(chunk)
+                output.write(chunk)
+
+        content_hash = digest.hexdigest()[:CONTENT_HASH_LENGTH]
+        existing = find_uploaded_file(content_hash)
+        if existing:
+            os.remove(temp_path)
+            # Uploaded again, so new to retention: no job names it until
+            # the run is started
+            os.utime(existing)
+            get_retention_manager().track(existing)
+            return os.path.basename(existing), existing
+
+        filename = f"{content_hash}_{original_name}"
+        filepath = os.path.join(UPLOAD_FOLDER, filename)
+        os.replace(temp_path, filepath)
+        get_retention_manager().track(filepath)
         return filename, filepath
     except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         raise Exception(f"Error saving file: {str(e)}")
 
 
+def find_uploaded_file(content_hash):
+    """
+    Find a stored upload by its content hash.
+
+    Args:
+        content_hash (str): Hash prefix used in stored filenames
+
+    Returns:
+        str: Path to the stored file, or None if the content is new
+    """
+    prefix = f"{content_hash}_"
+    for entry in os.scandir(UPLOAD_FOLDER):
+        if entry.is_file() and entry.name.startswith(prefix):
+            return entry.path
+    return None
+
+
+def display_filename(filename):
+    """
+    Strip the content-hash prefix from a stored upload name.
+
+    Args:
+        filename (str): Stored filename
+
+    Returns:
+        str: The filename as the user uploaded it
+    """
+    prefix, sep, rest = filename.partition('_')
+    if sep and len(prefix) == CONTENT_HASH_LENGTH and all(
+            c in '0123456789abcdef' for c in prefix):
+        return rest
+    return filename
+
+
 def get_file_columns(filepath):
     """
     Get column names from Excel or CSV file.
@@ -164,34 +270,41 @@ def get_file_columns(filepath):
     Returns:
         list: List of column names
     """
-    if filepath.endswith('.xlsx'):
-        columns, _ = LightweightFileReader.read_excel_file(filepath)
-    elif filepath.endswith('.csv'):
-        columns, _ = LightweightFileReader.read_csv_file(filepath)
-    else:
-        raise Exception("Unsupported file format")
-
+    columns, _ = _read_file(filepath)
     return columns
 
 
-def get_matric_list(filepath, matric_column):
+def _read_file(filepath):
     """
-    Get list of matric numbers from the specified column.
+    Read an Excel or CSV file with the matching reader.
 
     Args:
         filepath (str): Path to the file
-        matric_column (str): Name of the column containing matric numbers
 
     Returns:
-        list: List of matric numbers as strings
+        tuple: (column_names, rows_data)
     """
     if filepath.endswith('.xlsx'):
-        columns, rows_data = LightweightFileReader.read_excel_file(filepath)
+        return LightweightFileReader.read_excel_file(filepath)
     elif filepath.endswith('.csv'):
-        columns, rows_data = LightweightFileReader.read_csv_file(filepath)
+        return LightweightFileReader.read_csv_file(filepath)
     else:
         raise Exception("Unsupported file format")
 
+
+def get_matric_rows(filepath, matric_column):
+    """
+    Get matric numbers together with the spreadsheet row they came from.
+
+    Args:
+        filepath (str): Path to the file
+        matric_column (str): Name of the column containing matric numbers
+
+    Returns:
+        list: List of (row_number, matric) tuples, row 1 being the header
+    """
+    columns, rows_data = _read_file(filepath)
+
     if matric_column not in columns:
         raise Exception(f"Column '{matric_column}' not found in file")
 
@@ -199,14 +312,301 @@ def get_matric_list(filepath, matric_column):
     column_index = columns.index(matric_column)
 
     # Extract matric numbers from that column
-    matric_list = []
-    for row in rows_data:
+    matric_rows = []
+    for row_number, row in enumerate(rows_data, 2):
         if column_index < len(row):
             cell_value = str(row[column_index]).strip()
             if cell_value and cell_value != 'nan' and cell_value != '':
-                matric_list.append(cell_value)
+                matric_rows.append((row_number, cell_value))
+
+    return matric_rows
+
+
+def get_matric_list(filepath, matric_column):
+    """
+    Get list of matric numbers from the specified column.
+
+    Args:
+        filepath (str): Path to the file
+        matric_column (str): Name of the column containing matric numbers
+
+    Returns:
+        list: List of matric numbers as strings
+    """
+    return [matric for _, matric in get_matric_rows(filepath, matric_column)]
+
+
+def get_common_columns(filepaths):
+    """
+    Get the column names shared by every file in a batch.
 
-    return matric_list
+    Args:
+        filepaths (list): Paths to the uploaded files
+
+    Returns:
+        list: Column names present in all files, in first-file order
+    """
+    column_sets = [get_file_columns(filepath) for filepath in filepaths]
+
+    if not column_sets:
+        return []
+
+    common = set(column_sets[0])
+    for columns in column_sets[1:]:
+        common &= set(columns)
+
+    return [col for col in column_sets[0] if col in common]
+
+
+def merge_matric_lists(filepaths, matric_column):
+    """
+    Parse several files and merge them into one work list.
+
+    The first occurrence of a matric number wins; later occurrences, within
+    the same file or across files, are reported as duplicates.
+
+    Args:
+        filepaths (list): Paths to the uploaded files
+        matric_column (str): Name of the column containing matric numbers
+
+    Returns:
+        tuple: (work_list, duplicates) where both are lists of dictionaries
+            with 'matric', 'source_file' and 'row' keys
+    """
+    work_list = []
+    duplicates = []
+    seen = set()
+    for filepath in filepaths:
+        matric_rows = get_matric_rows(filepath, matric_column)
+        source_file = display_filename(os.path.basename(filepath))
+        for row_number, matric in matric_rows:
+            entry = {'matric': matric, 'source_file': source_file,
+                     'row': row_number}
+            if matric in seen:
+                duplicates.append(entry)
+            else:
+                seen.add(matric)
+                work_list.append(entry)
+
+    return work_list, duplicates
+
+
+class RowOffsetIndex:
+    """
+    Sparse byte-offset index over the data rows of an uploaded file.
+
+    CSV files are indexed in place. Excel files are converted once to a CSV
+    copy under the preview cache folder, which is then indexed the same way.
+    Every ROW_INDEX_STRIDE-th row offset is kept, so a page is served by
+    seeking close to it instead of parsing the file from the start.
+    """
+
+    def __init__(self, filepath):
+        """
+        Build the index for a file.
+
+        Args:
+            filepath (str): Path to an uploaded .xlsx or .csv file
+        """
+        self.filepath = filepath
+        self.signature = _file_signature(filepath)
+        self.offsets = array('q')
+        self.total_rows = 0
+
+        if filepath.endswith('.xlsx'):
+            self.data_path = self._convert_excel(filepath)
+            self.delimiter = ','
+        elif filepath.endswith('.csv'):
+            self.data_path = filepath
+            self.delimiter = _sniff_delimiter(filepath)
+        else:
+            raise Exception("Unsupported file format")
+
+        self._build()
+
+    def _convert_excel(self, filepath):
+        """Write the active sheet to a CSV copy once and return its path."""
+        os.makedirs(PREVIEW_CACHE_FOLDER, exist_ok=True)
+        cache_path = os.path.join(
+            PREVIEW_CACHE_FOLDER, os.path.basename(filepath) + '.csv')
+
+        if (os.path.exists(cache_path)
+                and os.path.getmtime(cache_path) >= os.path.getmtime(filepath)):
+            return cache_path
+
+        import openpyxl
+
+        temp_path = cache_path + '.part'
+        try:
+            workbook = openpyxl.load_workbook(filepath, read_only=True)
+            with open(temp_path, 'w', encoding='utf-8', newline='') as file:
+                writer = csv.writer(file)
+                for i, row in enumerate(workbook.active.iter_rows(values_only=True)):
+                    if i == 0:
+                        writer.writerow([str(col) if col is not None else f"Column_{j}"
+                                         for j, col in enumerate(row)])
+                    else:
+                        writer.writerow([str(cell) if cell is not None else ''
+                                         for cell in row])
+            workbook.close()
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise Exception(f"Error reading Excel file: {str(e)}")
+
+        return cache_path
+
+    def _build(self):
+        """Scan the data file once, recording row start offsets."""
+        with open(self.data_path, 'rb') as file:
+            lines = _OffsetLineReader(file)
+            reader = csv.reader(lines, delimiter=self.delimiter)
+
+            header = next(reader, None)
+            self.columns = [str(col).strip()
+                            for col in header] if header else []
+
+            row_start = lines.offset
+            for _ in reader:
+                if self.total_rows % ROW_INDEX_STRIDE == 0:
+                    self.offsets.append(row_start)
+                self.total_rows += 1
+                row_start = lines.offset
+
+    def is_current(self):
+        """Check that the file has not changed since it was indexed."""
+        return os.path.exists(self.filepath) and \
+            _file_signature(self.filepath) == self.signature
+
+    def get_rows(self, offset, limit):
+        """
+        Read a page of data rows.
+
+        Args:
+            offset (int): Index of the first data row to return
+            limit (int): Maximum number of rows to return
+
+        Returns:
+            list: Rows padded to the header width, as lists of strings
+        """
+        if offset >= self.total_rows or limit <= 0:
+            return []
+
+        rows = []
+        with open(self.data_path, 'rb') as file:
+            file.seek(self.offsets[offset // ROW_INDEX_STRIDE])
+            reader = csv.reader(_OffsetLineReader(file),
+                                delimiter=self.delimiter)
+
+            # Skip forward from the nearest indexed row
+            for _ in range(offset % ROW_INDEX_STRIDE):
+                next(reader, None)
+
+            for row in reader:
+                rows.append([str(row[i]).strip() if i < len(row) else ''
+                             for i in range(len(self.columns))])
+                if len(rows) >= limit:
+                    break
+
+        return rows
+
+
+class _OffsetLineReader:
+    """Line iterator over a binary file that tracks the byte offset read so far."""
+
+    def __init__(self, file):
+        self.file = file
+        self.offset = file.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode('utf-8')
+
+
+def _file_signature(filepath):
+    """Size and modification time used to detect a changed file."""
+    stat = os.stat(filepath)
+    return stat.st_size, stat.st_mtime
+
+
+def _sniff_delimiter(filepath):
+    """Detect the delimiter of a CSV file the same way read_csv_file does."""
+    with open(filepath, 'r', encoding='utf-8', newline='') as file:
+        return _detect_delimiter(file.read(1024))
+
+
+_row_indexes = OrderedDict()
+_row_indexes_lock = threading.Lock()
+
+
+def get_row_index(filepath):
+    """
+    Get the row index for a file, building it on first use.
+
+    Args:
+        filepath (str): Path to the file
+
+    Returns:
+        RowOffsetIndex: Index that is current with the file on disk
+    """
+    with _row_indexes_lock:
+        index = _row_indexes.get(filepath)
+        if index and index.is_current():
+            _row_indexes.move_to_end(filepath)
+            return index
+
+    index = RowOffsetIndex(filepath)
+
+    with _row_indexes_lock:
+        _row_indexes[filepath] = index
+        _row_indexes.move_to_end(filepath)
+        while len(_row_indexes) > ROW_INDEX_CACHE_SIZE:
+            _row_indexes.popitem(last=False)
+
+    return index
+
+
+def get_file_preview(filepath, offset=0, limit=50, column=None):
+    """
+    Get one page of rows from an uploaded file.
+
+    Args:
+        filepath (str): Path to the file
+        offset (int): Index of the first data row to return
+        limit (int): Maximum number of rows to return
+        column (str): Optional column to pull sample values from
+
+    Returns:
+        dict: Page with columns, total_rows, rows and, when a column is
+            given, that column's non-empty values on the page as samples
+    """
+    index = get_row_index(filepath)
+    rows = index.get_rows(offset, limit)
+
+    preview = {
+        'columns': index.columns,
+        'total_rows': index.total_rows,
+        'offset': offset,
+        'limit': limit,
+        'rows': rows,
+    }
+
+    if column:
+        if column not in index.columns:
+            raise Exception(f"Column '{column}' not found in file")
+        column_index = index.columns.index(column)
+        preview['column'] = column
+        preview['samples'] = [row[column_index] for row in rows
+                              if row[column_index] and row[column_index] != 'nan']
+
+    return preview
 
 
 def validate_form_data(form_data):
@@ -225,46 +625,105 @@ def validate_form_data(form_data):
     required_fields = ['filename', 'username', 'password',
                        'matric_column', 'sesi', 'semester', 'achievement']
 
+    # A batch job carries one hidden filename field per uploaded file; JSON
+    # requests pass them as a 'filenames' list instead
+    if hasattr(form_data, 'getlist'):
+        filenames = [name.strip() for name in form_data.getlist('filename')
+                     if name.strip()]
+    else:
+        filenames = [str(name).strip() for name in form_data.get('filenames') or []
+                     if str(name).strip()]
+        if filenames and not form_data.get('filename'):
+            form_data = dict(form_data, filename=filenames[0])
+
     validated_data = {}
     for field in required_fields:
-        value = form_data.get(field, '').strip()
+        value = str(form_data.get(field) or '').strip()
         if not value:
             raise Exception(f"Field '{field}' is required")
         validated_data[field] = value
 
+    validated_data['filenames'] = filenames or [validated_data['filename']]
+
+    # Optional sampling profile of the first seconds of the run
+    profile_seconds = form_data.get('profile_seconds')
+    if profile_seconds not in (None, ''):
+        try:
+            profile_seconds = float(profile_seconds)
+        except (TypeError, ValueError):
+            profile_seconds = 0
+        if profile_seconds <= 0:
+            raise Exception("Field 'profile_seconds' must be a positive number")
+        validated_data['profile_seconds'] = profile_seconds
+
     return validated_data
 
 
-def clean_screenshots_folder():
+def save_uploaded_files(files):
     """
-    Clean up old screenshots to prevent folder from getting too large.
-    Keeps only the most recent 10 screenshots.
+    Save a batch of uploaded files and find their shared columns.
+
+    Args:
+        files (list): Flask file objects from request.files
+
+    Returns:
+        tuple: (filenames, columns) with the stored filenames and the
+            column names present in every file
+
+    Raises:
+        Exception: If no valid file was given or the files share no columns
     """
-    try:
-        from config import SCREENSHOTS_FOLDER
-
-        if not os.path.exists(SCREENSHOTS_FOLDER):
-            return
-
-        # Get all screenshot files
-        screenshot_files = []
-        for filename in os.listdir(SCREENSHOTS_FOLDER):
-            if filename.endswith('.png'):
-                filepath = os.path.join(SCREENSHOTS_FOLDER, filename)
-                screenshot_files.append((filepath, os.path.getmtime(filepath)))
-
-        # Sort by modification time (newest first)
-        screenshot_files.sort(key=lambda x: x[1], reverse=True)
-
-        # Keep only the most recent 10 files
-        for filepath, _ in screenshot_files[10:]:
-            try:
-                os.remove(filepath)
-            except Exception:
-                pass  # Ignore errors when deleting files
-
-    except Exception:
-        pass  # Ignore errors in cleanup
+    files = [file for file in files if file and file.filename]
+    if not files:
+        raise Exception(
+            "Invalid file type. Please upload .xlsx or .csv files only.")
+
+    filenames, filepaths = [], []
+    with UPLOAD_PARSE_SECONDS.time(stage='save'):
+        for file in files:
+            filename, filepath = process_uploaded_file(file)
+            filenames.append(filename)
+            filepaths.append(filepath)
+
+    with UPLOAD_PARSE_SECONDS.time(stage='columns'):
+        columns = get_common_columns(filepaths)
+    if not columns:
+        raise Exception("The uploaded files have no column names in common.")
+
+    return filenames, columns
+
+
+def build_job_spec(validated_data):
+    """
+    Turn validated form data into a job spec with the merged work list.
+
+    Args:
+        validated_data (dict): Output of validate_form_data
+
+    Returns:
+        tuple: (spec, duplicates) where spec is validated_data plus
+            'matric_list' and 'sources'
+
+    Raises:
+        Exception: If a file is missing or no matric numbers were found
+    """
+    filepaths = []
+    for name in validated_data['filenames']:
+        filepath = os.path.join(UPLOAD_FOLDER, secure_filename(name))
+        if not os.path.isfile(filepath):
+            raise Exception(f"Uploaded file '{name}' not found")
+        filepaths.append(filepath)
+
+    with UPLOAD_PARSE_SECONDS.time(stage='matric_list'):
+        work_list, duplicates = merge_matric_lists(
+            filepaths, validated_data['matric_column'])
+    if not work_list:
+        raise Exception("No valid matric numbers found in the selected column.")
+
+    spec = dict(validated_data,
+                matric_list=[entry['matric'] for entry in work_list],
+                sources={entry['matric']: entry for entry in work_list})
+    return spec, duplicates
 
 
 def format_success_message(success_count, error_count, failed_file=None):
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Worker process for the persistent Merit Akademik job queue
+
+Claims jobs from the SQLite queue under data/ and runs them one at a time.
+Start as many worker processes as there are browsers the machine can
+handle; each one picks up queued jobs and jobs left behind by a worker
+that stopped.
+
+Usage:
+    python worker.py
+    python worker.py --once
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+from config import JOB_POLL_SECONDS
+from jobs import run_job
+from job_queue import SQLiteJobQueue, QueuedJob, LeaseKeeper
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+def work(queue, worker_id, once=False, poll_seconds=JOB_POLL_SECONDS):
+    """
+    Claim and run jobs until interrupted.
+
+    Args:
+        queue (SQLiteJobQueue): Queue to take jobs from
+        worker_id (str): Id recorded on claimed jobs
+        once (bool): Stop when the queue is empty instead of waiting
+        poll_seconds (float): Delay between checks of an empty queue
+    """
+    log.info(f"Worker {worker_id} waiting for jobs in {queue.path}")
+
+    while True:
+        row = queue.claim(worker_id)
+        if row is None:
+            if once:
+                return
+            time.sleep(poll_seconds)
+            continue
+
+        job = QueuedJob(queue, row)
+        log.info(f"Running job {job.id} ({job.progress.get('total')} matric numbers)")
+
+        lease = LeaseKeeper(queue, job.id, worker_id)
+        lease.start()
+        try:
+            run_job(job)
+        finally:
+            lease.stop()
+
+        log.info(f"Job {job.id} finished: {job.status}")
+
+
+def main():
+    """Run a worker until interrupted."""
+    parser = argparse.ArgumentParser(description='Merit Akademik job worker')
+    parser.add_argument('--once', action='store_true',
+                        help='exit when the queue is empty')
+    parser.add_argument('--poll', type=float, default=JOB_POLL_SECONDS,
+                        help='seconds between checks of an empty queue')
+    args = parser.parse_args()
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        work(SQLiteJobQueue(), worker_id, once=args.once,
+             poll_seconds=args.poll)
+    except KeyboardInterrupt:
+        # The job's lease expires and another worker resumes it
+        log.info(f"Worker {worker_id} stopped")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)